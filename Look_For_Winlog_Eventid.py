@@ -1,8 +1,61 @@
 import json
 import csv
+import glob
+import gzip
+import hashlib
+import itertools
+import mmap
+import os
+import re
+import sqlite3
+import sys
+from array import array
 from collections import Counter
-from tkinter import Tk
-from tkinter.filedialog import askopenfilename, asksaveasfilename
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+EVENT_ID_KEY = 'winlog.event id'
+READ_CHUNK_CHARS = 1024 * 1024
+MAX_RECORD_CHARS = 16 * 1024 * 1024  # Larger objects are walked token by token rather than decoded whole
+BATCH_CHUNK_BYTES = 32 * 1024 * 1024  # Size of one line-aligned NDJSON slice handed to a worker process
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+EXPORT_PATTERNS = ("*.json", "*.ndjson", "*.jsonl", "*.gz")
+RECORD_LIST_KEYS = ("results", "records", "items")  # Where API responses keep their log records
+TIME_BUCKETS = {
+    "minute": (60 * 1000, "%Y-%m-%dT%H:%M"),
+    "hour": (3600 * 1000, "%Y-%m-%dT%H:00"),
+    "day": (86400 * 1000, "%Y-%m-%d"),
+}
+ISO_FRACTION = re.compile(r"\.(\d+)")  # Fractional seconds of an ISO 8601 timestamp
+HISTOGRAM_FLUSH_EVENTS = 1000000  # (event ID, timestamp) pairs buffered before they are bucketed in one vectorized step
+MAX_HISTOGRAM_BUCKETS = 20000  # Columns in the event ID x time-bucket matrix
+BUCKET_SPEC = re.compile(r"^(\d*)\s*(m|min|minute|h|hour|d|day)s?$")
+BUCKET_UNIT_MS = {"m": 60 * 1000, "min": 60 * 1000, "minute": 60 * 1000, "h": 3600 * 1000, "hour": 3600 * 1000, "d": 86400 * 1000, "day": 86400 * 1000}
+INDEX_BATCH_ROWS = 50000
+INDEX_HEAD_BYTES = 64 * 1024  # Prefix hashed to tell an appended-to file from a rewritten one
+# events.position is the byte offset of the record's line in NDJSON files (files.seekable = 1),
+# or the record's ordinal in other exports. The primary key keeps rows clustered by event ID, then time.
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    seekable INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    indexed_bytes INTEGER NOT NULL,
+    head_sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (event_id, timestamp, file_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_by_file ON events (file_id);
+"""
+# One JSON token after optional whitespace: punctuation, a complete string (contents in group 2) or a bare scalar
+JSON_TOKEN = re.compile(r'[ \t\r\n]*(?:([{}\[\],:])|"((?:[^"\\]|\\.)*)"|([^ \t\r\n{}\[\],:"]+))')
 
 def extract_event_ids(data):
     """
@@ -28,12 +81,793 @@ def extract_event_ids(data):
     search(data)
     return event_ids
 
+def open_text(path):
+    """Opens a JSON/NDJSON export for reading as text; .gz files are decompressed on the fly."""
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def decode_string(text):
+    return json.loads(f'"{text}"') if '\\' in text else text
+
+def count_event_ids_in(obj, counter, histogram=None):
+    """
+    Counts 'winlog.event id' values inside an already decoded object, using an explicit stack instead of recursion.
+    With a histogram (see new_histogram), every counted ID is also recorded with the timestamp of the nearest
+    enclosing object that has one, so records wrapped in an API response ({"results": [...]}) are binned too.
+    """
+    stack = [(obj, None)]  # (value, timestamp inherited from the enclosing objects)
+    while stack:
+        obj, timestamp = stack.pop()
+        if isinstance(obj, dict):
+            if histogram is not None and "timestamp" in obj:
+                timestamp = timestamp_ms(obj["timestamp"])
+            value = obj.get(EVENT_ID_KEY)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, str) and item.isdigit():
+                        counter[int(item)] += 1
+                        if timestamp is not None:
+                            add_to_histogram(histogram, int(item), timestamp)
+            stack.extend((child, timestamp) for child in obj.values() if isinstance(child, (dict, list)))
+        elif isinstance(obj, list):
+            stack.extend((child, timestamp) for child in obj if isinstance(child, (dict, list)))
+    return counter
+
+def iter_json_events(file, chunk_chars=READ_CHUNK_CHARS, max_record_chars=MAX_RECORD_CHARS):
+    """
+    Walks JSON read from a text file one chunk at a time (one document, or NDJSON / concatenated documents) and yields:
+    (0, record) for each object that is an array element or a top-level document, decoded whole with the C decoder;
+    (kind, text) for every other token: 1 is punctuation, 2 a string (raw contents, escapes not decoded) and
+    3 a number/true/false/null.
+    Objects larger than max_record_chars (or malformed) are walked token by token instead, so memory stays at
+    about one chunk plus one record whatever the input size.
+    """
+    decoder = json.JSONDecoder()
+    containers = []  # Explicit stack: True for each open object, False for each open array
+    buffer = ""
+    pos = 0
+    eof = False
+
+    while True:
+        match = JSON_TOKEN.match(buffer, pos)
+        # A token touching the end of the buffer may continue in the next chunk
+        if match is None or (match.end() == len(buffer) and not eof):
+            if eof:
+                if buffer[pos:].strip():
+                    raise ValueError(f"Invalid or truncated JSON near: {buffer[pos:pos + 40]!r}")
+                break
+            chunk = file.read(chunk_chars)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        kind = match.lastindex
+        text = match.group(kind)
+        pos = match.end()
+
+        if kind == 1:
+            if text == '{' and not (containers and containers[-1]):
+                # One record: decode it whole, reading more until it is complete (the read size doubles each time)
+                start = pos - 1
+                while True:
+                    try:
+                        record, end = decoder.raw_decode(buffer, start)
+                    except json.JSONDecodeError:
+                        if eof or len(buffer) - start > max_record_chars:
+                            record = None  # Malformed or too large: walk it token by token instead
+                            break
+                        chunk = file.read(max(chunk_chars, len(buffer) - start))
+                        eof = not chunk
+                        buffer = buffer[start:] + chunk
+                        start = 0
+                        continue
+                    break
+                if record is not None:
+                    yield 0, record
+                    pos = end
+                    continue
+                pos = start + 1
+
+            if text == '{' or text == '[':
+                containers.append(text == '{')
+            elif text == '}' or text == ']':
+                if not containers:
+                    raise ValueError(f"Unbalanced '{text}' in JSON input")
+                containers.pop()
+
+        yield kind, text
+
+    if containers:
+        raise ValueError("Truncated JSON input: unclosed object or array")
+
+def count_event_ids(file, counter=None, chunk_chars=READ_CHUNK_CHARS, max_record_chars=MAX_RECORD_CHARS, histogram=None):
+    """
+    Streams JSON from a text file and counts the numerical values of every 'winlog.event id': ['<value>']
+    into counter in place. Decoded records are counted with count_event_ids_in (and binned into histogram, if
+    given); parts that are walked token by token keep their own explicit stack of open containers to find the key.
+    In the walked parts each object holds on to the IDs found inside it until it closes, then bins them with its
+    own timestamp or hands them to the enclosing object, the same nearest-timestamp rule as count_event_ids_in.
+    """
+    counter = Counter() if counter is None else counter
+    stack = []  # One [is_object, expecting_key, last_key, timestamp, pending IDs] entry per open container
+    event_id_depth = None  # Depth of the open 'winlog.event id' list, if any
+
+    for kind, text in iter_json_events(file, chunk_chars, max_record_chars):
+        if kind == 0:
+            count_event_ids_in(text, counter, histogram)
+        elif kind == 1:
+            if text == '{' or text == '[':
+                if text == '[' and stack and stack[-1][0] and stack[-1][2] == EVENT_ID_KEY:
+                    event_id_depth = len(stack) + 1
+                stack.append([text == '{', True, None, None, []])
+            elif text == '}' or text == ']':
+                if event_id_depth == len(stack):
+                    event_id_depth = None
+                closed = stack.pop()
+                if closed[4]:
+                    if closed[3] is not None:
+                        for event_id in closed[4]:
+                            add_to_histogram(histogram, event_id, closed[3])
+                    else:
+                        parent = next((entry for entry in reversed(stack) if entry[0]), None)
+                        if parent is not None:
+                            parent[4].extend(closed[4])
+            elif text == ',' and stack and stack[-1][0]:
+                stack[-1][1] = True
+        elif stack and stack[-1][0] and stack[-1][1]:
+            # Object key: remember it for the value that follows
+            stack[-1][1] = False
+            stack[-1][2] = decode_string(text) if kind == 2 else text
+        elif kind == 2 and event_id_depth == len(stack):
+            value = decode_string(text)
+            if value.isdigit():
+                counter[int(value)] += 1
+                if histogram is not None:
+                    stack[-2][4].append(int(value))  # The object holding the 'winlog.event id' list
+        elif histogram is not None and stack and stack[-1][0] and stack[-1][2] == "timestamp":
+            stack[-1][3] = timestamp_ms(decode_string(text) if kind == 2 else text)
+
+    return counter
+
+def iter_records(file):
+    """
+    Yields every log record of a JSON/NDJSON export (array elements and top-level objects);
+    a top-level API response such as {"results": [...]} is unwrapped into its records.
+    Records over MAX_RECORD_CHARS are not decoded, so they cannot be yielded; how many were skipped is printed.
+    """
+    walked = []  # One [is_object, holds_records, expecting_key, last_key, has_records] entry per walked container
+    skipped = 0
+    for kind, record in iter_json_events(file):
+        parent = walked[-1] if walked else None
+        if kind == 0:
+            if parent is not None and (parent[0] or not parent[1]):
+                continue  # A piece of a record too large to decode, not a record of its own
+            if parent is not None:
+                parent[4] = True
+        elif kind == 1:
+            if record == '{' or record == '[':
+                if record == '{':
+                    # A record (or a wrapper of records) at the top level or in a list of records
+                    holds_records = parent is None or (not parent[0] and parent[1])
+                else:
+                    # The top-level list, or the "results"/"records"/"items" list of a record-level object
+                    holds_records = parent is None or (parent[0] and parent[1] and parent[3] in RECORD_LIST_KEYS)
+                walked.append([record == '{', holds_records, True, None, False])
+            elif record == '}' or record == ']':
+                is_object, holds_records, _, _, has_records = walked.pop()
+                if has_records and walked:
+                    walked[-1][4] = True
+                elif is_object and holds_records and not has_records:
+                    skipped += 1  # Too large to decode
+            elif record == ',' and parent is not None and parent[0]:
+                parent[2] = True
+            continue
+        else:
+            if parent is not None and parent[0] and parent[2]:
+                # Object key: remember it for the value that follows
+                parent[2] = False
+                parent[3] = decode_string(record) if kind == 2 else record
+            continue
+        if "timestamp" not in record:
+            records = next((record[key] for key in RECORD_LIST_KEYS if isinstance(record.get(key), list)), None)
+            if records is not None:
+                yield from (item for item in records if isinstance(item, dict))
+                continue
+        yield record
+    if skipped:
+        print(f"Skipped {skipped} records larger than {MAX_RECORD_CHARS} characters (not in group-bys or the index)")
+
+def as_values(value):
+    """Normalizes a field value to a tuple of hashable values: () when missing, one entry per list item."""
+    if value is None:
+        return ()
+    if isinstance(value, list):
+        return tuple(scalar_value(item) for item in value)
+    return (scalar_value(value),)
+
+def scalar_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+def timestamp_ms(value):
+    """
+    Converts a timestamp (epoch ms as a number or numeric text, or ISO 8601 text; naive times are taken as UTC)
+    to epoch ms. None when missing or unparseable, so one bad record does not abort a run.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, str):
+            text = value.strip()
+            try:
+                return int(float(text))
+            except ValueError:
+                pass
+            # fromisoformat before Python 3.11 wants "T", "+00:00" instead of "Z" and 3 or 6 fraction digits
+            text = text.replace(" ", "T", 1)
+            if text.endswith(("Z", "z")):
+                text = text[:-1] + "+00:00"
+            text = ISO_FRACTION.sub(lambda match: "." + (match.group(1) + "00000")[:6], text)
+            parsed = datetime.fromisoformat(text)
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return int(parsed.timestamp() * 1000)
+        return int(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+def compile_time_bucket(unit):
+    """Returns a getter for the record's timestamp floored to minute/hour/day (see timestamp_ms)."""
+    size = TIME_BUCKETS[unit][0]
+    label_format = TIME_BUCKETS[unit][1]
+    labels = {}  # Bucket start (ms) -> label; each bucket is formatted once
+
+    def get(record):
+        timestamp = timestamp_ms(record.get("timestamp"))
+        if timestamp is None:
+            return ()
+        start = timestamp // size * size
+        label = labels.get(start)
+        if label is None:
+            label = labels[start] = datetime.fromtimestamp(start / 1000, tz=timezone.utc).strftime(label_format)
+        return (label,)
+
+    return get
+
+def compile_field(spec):
+    """
+    Resolves a field spec once into a direct lookup returning a tuple of values:
+    'minute'/'hour'/'day' bucket the record timestamp, 'a/b/c' is a nested path, and a bare name
+    (e.g. 'winlog.event id', 'host.name') is a top-level key or an additionalColumns entry.
+    """
+    if spec in TIME_BUCKETS:
+        return compile_time_bucket(spec)
+
+    keys = spec.split("/")
+    if len(keys) == 1:
+        key = keys[0]
+
+        def get(record):
+            value = record.get(key)
+            if value is None:
+                columns = record.get("additionalColumns")
+                if columns:
+                    value = columns.get(key)
+            return as_values(value)
+    else:
+        def get(record):
+            value = record
+            for key in keys:
+                if not isinstance(value, dict):
+                    return ()
+                value = value.get(key)
+            return as_values(value)
+
+    return get
+
+def aggregate_records(records, group_bys, counters=None):
+    """
+    Counts records for several group-bys in one pass. group_bys is a list of field-spec lists, e.g.
+    [['winlog.event id'], ['winlog.event id', 'host.name', 'hour']]; returns one Counter of value tuples per group-by.
+    Each distinct field is looked up once per record; records missing a field are left out of that group-by,
+    and multi-valued fields count every combination.
+    """
+    fields = list(dict.fromkeys(spec for specs in group_bys for spec in specs))
+    getters = [compile_field(spec) for spec in fields]
+    indexes = [tuple(fields.index(spec) for spec in specs) for specs in group_bys]
+    counters = counters if counters is not None else [Counter() for _ in group_bys]
+
+    for record in records:
+        values = [get(record) for get in getters]
+        for counter, index in zip(counters, indexes):
+            parts = [values[i] for i in index]
+            if all(len(part) == 1 for part in parts):
+                counter[tuple(part[0] for part in parts)] += 1
+            elif all(parts):
+                for combination in itertools.product(*parts):
+                    counter[combination] += 1
+
+    return counters
+
+def parse_bucket(spec):
+    """Converts a time-bucket spec such as 15m, 1h, hour or 1d to milliseconds."""
+    match = BUCKET_SPEC.match(spec.strip().lower())
+    if not match or match.group(1) == "0":
+        raise ValueError(f"Invalid time bucket '{spec}'. Use e.g. 15m, 1h or 1d.")
+    return int(match.group(1) or 1) * BUCKET_UNIT_MS[match.group(2)]
+
+def new_histogram(bucket_ms):
+    """Event ID x time-bucket counts: pairs are buffered in compact arrays and bucketed in vectorized batches."""
+    return {"bucket_ms": bucket_ms, "event_ids": array('q'), "timestamps": array('q'), "cells": Counter()}
+
+def add_to_histogram(histogram, event_id, timestamp):
+    histogram["event_ids"].append(event_id)
+    histogram["timestamps"].append(timestamp)
+    if len(histogram["event_ids"]) >= HISTOGRAM_FLUSH_EVENTS:
+        flush_histogram(histogram)
+
+def flush_histogram(histogram):
+    """Bins the buffered pairs in one vectorized step and adds them to the sparse (event ID, bucket start) counts."""
+    if not histogram["event_ids"]:
+        return histogram["cells"]
+    import numpy as np
+
+    event_ids = np.frombuffer(histogram["event_ids"], dtype=np.int64)
+    buckets = np.frombuffer(histogram["timestamps"], dtype=np.int64) // histogram["bucket_ms"] * histogram["bucket_ms"]
+    order = np.lexsort((buckets, event_ids))
+    event_ids = event_ids[order]
+    buckets = buckets[order]
+    starts = np.flatnonzero(np.r_[True, (event_ids[1:] != event_ids[:-1]) | (buckets[1:] != buckets[:-1])])
+    counts = np.diff(np.r_[starts, len(event_ids)])
+
+    cells = histogram["cells"]
+    for event_id, bucket, count in zip(event_ids[starts].tolist(), buckets[starts].tolist(), counts.tolist()):
+        cells[(event_id, bucket)] += count
+
+    histogram["event_ids"] = array('q')
+    histogram["timestamps"] = array('q')
+    return cells
+
+def bucket_label(bucket_start, bucket_ms):
+    label_format = "%Y-%m-%d" if bucket_ms % (86400 * 1000) == 0 else "%Y-%m-%dT%H:%M"
+    return datetime.fromtimestamp(bucket_start / 1000, tz=timezone.utc).strftime(label_format)
+
+def write_histogram(cells, bucket_ms, output_file, heatmap_file=None):
+    """
+    Writes the event ID x time-bucket count matrix: one row per event ID, one column per bucket from the first
+    to the last (empty buckets included, so bursts line up). A .parquet output is columnar (needs pandas with a
+    Parquet engine); anything else is CSV. With heatmap_file, the same matrix is also drawn as a heat map PNG.
+    """
+    import numpy as np
+
+    if not cells:
+        print("No timestamped event IDs found. Histogram not written.")
+        return
+
+    keys = np.array(list(cells.keys()), dtype=np.int64)
+    counts = np.fromiter(cells.values(), dtype=np.int64, count=len(cells))
+    event_ids = np.unique(keys[:, 0])
+    first_bucket = int(keys[:, 1].min())
+    bucket_count = (int(keys[:, 1].max()) - first_bucket) // bucket_ms + 1
+    if bucket_count > MAX_HISTOGRAM_BUCKETS:
+        raise ValueError(f"{bucket_count} time buckets exceed the limit of {MAX_HISTOGRAM_BUCKETS}. Use a larger bucket.")
+
+    matrix = np.zeros((len(event_ids), bucket_count), dtype=np.int64)
+    matrix[np.searchsorted(event_ids, keys[:, 0]), (keys[:, 1] - first_bucket) // bucket_ms] = counts
+    labels = [bucket_label(first_bucket + i * bucket_ms, bucket_ms) for i in range(bucket_count)]
+
+    if output_file.endswith(".parquet"):
+        import pandas as pd
+        frame = pd.DataFrame(matrix, index=pd.Index(event_ids, name="Event ID"), columns=labels)
+        frame.to_parquet(output_file)
+    else:
+        with open(output_file, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['Event ID'] + labels)
+            for event_id, row in zip(event_ids.tolist(), matrix.tolist()):
+                writer.writerow([event_id] + row)
+    print(f"Histogram ({len(event_ids)} event IDs x {bucket_count} buckets) saved to: {output_file}")
+
+    if heatmap_file:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots(figsize=(min(4 + bucket_count * 0.15, 30), min(2 + len(event_ids) * 0.3, 30)))
+        image = ax.imshow(matrix, aspect="auto", interpolation="nearest", cmap="viridis")
+        ax.set_yticks(range(len(event_ids)))
+        ax.set_yticklabels(event_ids.tolist())
+        step = max(1, bucket_count // 30)
+        ax.set_xticks(range(0, bucket_count, step))
+        ax.set_xticklabels(labels[::step], rotation=90)
+        ax.set_ylabel("Event ID")
+        ax.set_title("Event IDs per time bucket (UTC)")
+        fig.colorbar(image, ax=ax, label="Count")
+        fig.tight_layout()
+        fig.savefig(heatmap_file)
+        plt.close(fig)
+        print(f"Heat map saved to: {heatmap_file}")
+
+def histogram_paths(output_file, bucket_spec, heatmap):
+    root = os.path.splitext(output_file)[0]
+    slug = re.sub(r'[^A-Za-z0-9]+', '', bucket_spec)
+    return f"{root}-histogram-{slug}.csv", (f"{root}-heatmap-{slug}.png" if heatmap else None)
+
+def write_counts_csv(output_file, event_id_counts):
+    with open(output_file, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['Event ID', 'Count'])
+        for event_id, count in event_id_counts.items():
+            writer.writerow([event_id, count])
+
+def write_group_csv(output_file, specs, counter):
+    """Writes one group-by as CSV: one column per field plus Count, rows sorted by the field values."""
+    with open(output_file, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(list(specs) + ['Count'])
+        for values, count in sorted(counter.items(), key=lambda item: tuple(map(str, item[0]))):
+            writer.writerow(list(values) + [count])
+
+def group_csv_path(output_file, specs):
+    root = os.path.splitext(output_file)[0]
+    return f"{root}-{'-'.join(re.sub(r'[^A-Za-z0-9]+', '_', spec).strip('_') for spec in specs)}.csv"
+
+def iter_ndjson_range(path, start, end, required=None):
+    """
+    Yields the decoded records of a memory-mapped NDJSON file between byte offsets start and end (both on line
+    boundaries). With required (bytes), lines that do not contain it are skipped without being decoded.
+    """
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        mapped.seek(start)
+        while mapped.tell() < end:
+            line = mapped.readline()
+            if (required in line) if required else line.strip():
+                yield json.loads(line)
+
+def count_ndjson_range(path, start, end, bucket_ms=None):
+    """Worker: counts event IDs in one line-aligned range of an NDJSON file; returns (counts, histogram cells or None)."""
+    counter = Counter()
+    histogram = new_histogram(bucket_ms) if bucket_ms else None
+    for record in iter_ndjson_range(path, start, end, required=EVENT_ID_KEY.encode('utf-8')):
+        count_event_ids_in(record, counter, histogram)
+    return counter, flush_histogram(histogram) if histogram else None
+
+def count_file(path, bucket_ms=None):
+    """Worker: streams one whole JSON/gzip export through count_event_ids; returns (counts, histogram cells or None)."""
+    histogram = new_histogram(bucket_ms) if bucket_ms else None
+    with open_text(path) as file:
+        counter = count_event_ids(file, histogram=histogram)
+    return counter, flush_histogram(histogram) if histogram else None
+
+def aggregate_ndjson_range(path, start, end, group_bys):
+    """Worker: runs the group-bys over one line-aligned range of an NDJSON file."""
+    return aggregate_records(iter_ndjson_range(path, start, end), group_bys)
+
+def aggregate_file(path, group_bys):
+    """Worker: streams the records of one whole JSON/gzip export through the group-bys."""
+    with open_text(path) as file:
+        return aggregate_records(iter_records(file), group_bys)
+
+def line_aligned_ranges(path, chunk_bytes=BATCH_CHUNK_BYTES):
+    """Splits an NDJSON file into (start, end) byte ranges of about chunk_bytes that end just after a newline."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    ranges = []
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = 0
+        while start < size:
+            newline = mapped.find(b"\n", min(start + chunk_bytes, size) - 1)
+            end = size if newline == -1 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def find_export_files(source):
+    """Expands a directory (every JSON/NDJSON/gzip export in it) or a glob pattern into a sorted list of files."""
+    if os.path.isdir(source):
+        paths = [path for pattern in EXPORT_PATTERNS for path in glob.glob(os.path.join(source, pattern))]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in set(paths) if os.path.isfile(path))
+
+def run_batch(paths, range_worker, file_worker, worker_args=(), workers=None, chunk_bytes=BATCH_CHUNK_BYTES):
+    """
+    Runs the workers over many export files in a process pool and yields each task's result as it completes.
+    Uncompressed NDJSON files are split into line-aligned mmap ranges (range_worker) so one big file still uses
+    every core; other files (single JSON documents, .gz) are streamed whole, one file_worker task per file.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for path in paths:
+            if path.endswith(NDJSON_EXTENSIONS):
+                for start, end in line_aligned_ranges(path, chunk_bytes):
+                    futures[executor.submit(range_worker, path, start, end, *worker_args)] = path
+            else:
+                futures[executor.submit(file_worker, path, *worker_args)] = path
+
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                yield future.result()
+            except Exception as e:
+                raise RuntimeError(f"Failed to parse {futures[future]}: {e}") from e
+            if done % 100 == 0 or done == len(futures):
+                print(f"Processed {done}/{len(futures)} chunks")
+
+def count_event_ids_batch(paths, workers=None, chunk_bytes=BATCH_CHUNK_BYTES, bucket_ms=None):
+    """
+    Counts event IDs over many export files in a process pool and merges the per-task Counters.
+    With bucket_ms, the event ID x time-bucket cells are merged too; returns (counts, cells or None).
+    """
+    total = Counter()
+    cells = Counter() if bucket_ms else None
+    for counter, task_cells in run_batch(paths, count_ndjson_range, count_file, (bucket_ms,), workers, chunk_bytes):
+        total.update(counter)
+        if task_cells:
+            cells.update(task_cells)
+    return total, cells
+
+def aggregate_batch(paths, group_bys, workers=None, chunk_bytes=BATCH_CHUNK_BYTES):
+    """Runs several group-by counts over many export files in one pass per file and merges them."""
+    totals = [Counter() for _ in group_bys]
+    for counters in run_batch(paths, aggregate_ndjson_range, aggregate_file, (group_bys,), workers, chunk_bytes):
+        for total, counter in zip(totals, counters):
+            total.update(counter)
+    return totals
+
+def file_head_sha1(path, length):
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read(min(length, INDEX_HEAD_BYTES))).hexdigest()
+
+def add_event_rows(rows, record, file_id, position):
+    """Appends one (event_id, timestamp, file_id, position) row per distinct event ID in the record."""
+    timestamp = timestamp_ms(record.get("timestamp")) or 0
+    for event_id in count_event_ids_in(record, Counter()):
+        rows.append((event_id, timestamp, file_id, position))
+
+def insert_event_rows(connection, rows):
+    connection.executemany("INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?)", rows)
+    rows.clear()
+
+def index_ndjson(connection, file_id, path, start):
+    """
+    Indexes the complete lines of an NDJSON file from byte offset start and returns the offset indexed up to.
+    A line still being written (no trailing newline yet) is left for the next update.
+    """
+    if os.path.getsize(path) == 0:
+        return 0
+
+    key = EVENT_ID_KEY.encode('utf-8')
+    rows = []
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        end = mapped.rfind(b"\n", start) + 1
+        if end <= start:
+            return start
+        mapped.seek(start)
+        while mapped.tell() < end:
+            position = mapped.tell()
+            line = mapped.readline()
+            if key in line:
+                add_event_rows(rows, json.loads(line), file_id, position)
+                if len(rows) >= INDEX_BATCH_ROWS:
+                    insert_event_rows(connection, rows)
+    insert_event_rows(connection, rows)
+    return end
+
+def index_export(connection, file_id, path):
+    """Indexes a JSON/gzip export that cannot be seeked into by line; positions are record ordinals."""
+    rows = []
+    with open_text(path) as file:
+        for position, record in enumerate(iter_records(file)):
+            add_event_rows(rows, record, file_id, position)
+            if len(rows) >= INDEX_BATCH_ROWS:
+                insert_event_rows(connection, rows)
+    insert_event_rows(connection, rows)
+
+def update_index(db_path, paths):
+    """
+    Adds new and changed export files to the SQLite event-ID index at db_path (created when missing).
+    Unchanged files are skipped; an NDJSON file that was only appended to (same leading bytes) has just its new
+    lines indexed, so the index can be kept current while exports are still being written. Files that no longer
+    exist are dropped. Returns the number of files (re)indexed.
+    """
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executescript(INDEX_SCHEMA)
+        with connection:
+            for file_id, path in connection.execute("SELECT id, path FROM files").fetchall():
+                if not os.path.exists(path):
+                    connection.execute("DELETE FROM events WHERE file_id = ?", (file_id,))
+                    connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+        updated = 0
+        for path in map(os.path.abspath, paths):
+            stat = os.stat(path)
+            seekable = path.endswith(NDJSON_EXTENSIONS)
+            row = connection.execute(
+                "SELECT id, size, mtime_ns, indexed_bytes, head_sha1 FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+                continue  # Unchanged since the last update
+
+            start = 0
+            if row and seekable and stat.st_size >= row[3] and file_head_sha1(path, row[3]) == row[4]:
+                start = row[3]  # Appended to since the last update: index only the new lines
+
+            with connection:  # One transaction per file
+                if row:
+                    file_id = row[0]
+                    if start == 0:
+                        connection.execute("DELETE FROM events WHERE file_id = ?", (file_id,))
+                else:
+                    file_id = connection.execute(
+                        "INSERT INTO files (path, seekable, size, mtime_ns, indexed_bytes, head_sha1) VALUES (?, ?, 0, 0, 0, '')",
+                        (path, int(seekable)),
+                    ).lastrowid
+
+                if seekable:
+                    indexed_bytes = index_ndjson(connection, file_id, path, start)
+                else:
+                    index_export(connection, file_id, path)
+                    indexed_bytes = stat.st_size
+
+                connection.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ?, indexed_bytes = ?, head_sha1 = ? WHERE id = ?",
+                    (stat.st_size, stat.st_mtime_ns, indexed_bytes, file_head_sha1(path, indexed_bytes), file_id),
+                )
+            updated += 1
+            print(f"Indexed {path}" + (f" from byte {start}" if start else ""))
+
+        return updated
+    finally:
+        connection.close()
+
+def query_index(db_path, event_id=None, start_ms=None, end_ms=None, limit=0):
+    """
+    Answers from the index alone, over the optional [start_ms, end_ms) range:
+    without event_id, returns {event_id: count}; with event_id, returns (count, up to `limit` earliest
+    matches as (path, seekable, position, timestamp)).
+    """
+    start_ms = -2 ** 63 if start_ms is None else start_ms
+    end_ms = 2 ** 63 - 1 if end_ms is None else end_ms
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        if event_id is None:
+            return dict(connection.execute(
+                "SELECT event_id, COUNT(*) FROM events WHERE timestamp >= ? AND timestamp < ? GROUP BY event_id",
+                (start_ms, end_ms),
+            ).fetchall())
+
+        count = connection.execute(
+            "SELECT COUNT(*) FROM events WHERE event_id = ? AND timestamp >= ? AND timestamp < ?",
+            (event_id, start_ms, end_ms),
+        ).fetchone()[0]
+        matches = connection.execute(
+            "SELECT files.path, files.seekable, events.position, events.timestamp FROM events"
+            " JOIN files ON files.id = events.file_id"
+            " WHERE events.event_id = ? AND events.timestamp >= ? AND events.timestamp < ?"
+            " ORDER BY events.timestamp LIMIT ?",
+            (event_id, start_ms, end_ms, limit),
+        ).fetchall() if limit else []
+        return count, matches
+    finally:
+        connection.close()
+
+def read_record(path, position):
+    """Reads the NDJSON record whose line starts at byte offset position."""
+    with open(path, 'rb') as file:
+        file.seek(position)
+        return json.loads(file.readline())
+
+def index_main(options):
+    """--index DB with --batch SOURCE updates the index; without it, answers --event-id/--from/--to queries."""
+    if options.batch:
+        paths = find_export_files(options.batch)
+        if not paths:
+            print(f"No export files found for: {options.batch}")
+            return 1
+        updated = update_index(options.index, paths)
+        print(f"Index {options.index} is up to date ({updated} of {len(paths)} files indexed)")
+        return 0
+
+    if not os.path.exists(options.index):
+        print(f"Index not found: {options.index}. Build it first with --batch SOURCE --index {options.index}")
+        return 1
+
+    start_ms = timestamp_ms(getattr(options, "from"))
+    end_ms = timestamp_ms(options.to)
+    for name, text, parsed in (("--from", getattr(options, "from"), start_ms), ("--to", options.to, end_ms)):
+        if text and parsed is None:
+            print(f"Invalid {name} time: {text} (expected epoch ms or ISO 8601)")
+            return 1
+    if options.event_id is None:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['Event ID', 'Count'])
+        for event_id, count in sorted(query_index(options.index, None, start_ms, end_ms).items()):
+            writer.writerow([event_id, count])
+        return 0
+
+    count, matches = query_index(options.index, options.event_id, start_ms, end_ms, options.show)
+    print(f"Event ID {options.event_id}: {count} records")
+    for path, seekable, position, timestamp in matches:
+        if seekable:
+            print(json.dumps(read_record(path, position), ensure_ascii=False))
+        else:
+            print(f"{path} record #{position} at {timestamp}")
+    return 0
+
+def batch_main(args):
+    """
+    Headless mode: python Look_For_Winlog_Eventid.py --batch <directory or glob> [--output CSV] [--workers N]
+    [--group-by FIELDS ...], e.g. --group-by "winlog.event id,host.name,hour" --group-by "log.source,day".
+    Event IDs per time bucket: --histogram 1h [--histogram-output FILE] [--heatmap].
+    Index: --batch SOURCE --index DB builds/updates it; --index DB [--event-id N] [--from T] [--to T] [--show N] queries it.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Count 'winlog.event id' values (or any field group-bys) over many log export files.")
+    parser.add_argument("--batch", metavar="SOURCE", help="Directory of exports or a glob such as 'exports/*.ndjson'")
+    parser.add_argument("--output", default=None, help="CSV file to write (default: event_id_counts.csv); with --group-by, the name each group-by CSV is derived from")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--group-by", action="append", default=[], metavar="FIELDS",
+                        help="Comma-separated fields to count together: record keys, additionalColumns names, nested a/b paths or minute/hour/day. Repeat for several group-bys in the same pass.")
+    parser.add_argument("--histogram", metavar="BUCKET", default=None, help="Also write an event ID x time-bucket matrix, e.g. 15m, 1h or 1d")
+    parser.add_argument("--histogram-output", metavar="FILE", default=None, help="Histogram file (.csv, or .parquet for columnar output); default derived from --output")
+    parser.add_argument("--heatmap", action="store_true", help="Also draw the histogram as a heat map PNG")
+    parser.add_argument("--index", metavar="DB", help="SQLite event-ID index: updated from --batch SOURCE, otherwise queried")
+    parser.add_argument("--event-id", type=int, default=None, help="Index query: count (and --show) records with this event ID")
+    parser.add_argument("--from", default=None, metavar="TIME", help="Index query: start time, epoch ms or ISO 8601, UTC unless it has an offset (inclusive)")
+    parser.add_argument("--to", default=None, metavar="TIME", help="Index query: end time, epoch ms or ISO 8601, UTC unless it has an offset (exclusive)")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="Index query: print the first N matching records")
+    options = parser.parse_args(args)
+
+    if options.index:
+        return index_main(options)
+    if not options.batch:
+        parser.error("--batch SOURCE is required unless querying an --index")
+
+    paths = find_export_files(options.batch)
+    if not paths:
+        print(f"No export files found for: {options.batch}")
+        return 1
+
+    if options.group_by:
+        group_bys = [[spec.strip() for spec in fields.split(",") if spec.strip()] for fields in options.group_by]
+        print(f"Counting {len(group_bys)} group-bys in {len(paths)} files...")
+        output_file = options.output or "log_counts.csv"
+        for specs, counter in zip(group_bys, aggregate_batch(paths, group_bys, options.workers)):
+            group_file = group_csv_path(output_file, specs)
+            write_group_csv(group_file, specs, counter)
+            print(f"CSV output successfully saved to: {group_file}")
+        return 0
+
+    print(f"Counting event IDs in {len(paths)} files...")
+    output_file = options.output or "event_id_counts.csv"
+    bucket_ms = parse_bucket(options.histogram) if options.histogram else None
+    event_id_counts, cells = count_event_ids_batch(paths, options.workers, bucket_ms=bucket_ms)
+    write_counts_csv(output_file, dict(sorted(event_id_counts.items())))
+    print(f"CSV output successfully saved to: {output_file}")
+
+    if bucket_ms:
+        histogram_file, heatmap_file = histogram_paths(output_file, options.histogram, options.heatmap)
+        write_histogram(cells, bucket_ms, options.histogram_output or histogram_file, heatmap_file)
+    return 0
+
 def main():
+    from tkinter import Tk  # Only the interactive mode needs Tk (batch mode runs headless)
+    from tkinter.filedialog import askopenfilename, asksaveasfilename
+
     # Open file dialog to select the input JSON file
     Tk().withdraw()  # Suppress root Tkinter window
     input_file = askopenfilename(
         title="Select JSON File to Parse",
-        filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
+        filetypes=[("JSON Files", "*.json"), ("NDJSON Files", "*.ndjson"), ("Gzipped Exports", "*.gz"), ("All Files", "*.*")]
     )
 
     if not input_file:
@@ -51,25 +885,29 @@ def main():
         print("No output file selected. Exiting...")
         return
 
+    # Optional event ID x time-bucket histogram, built in the same pass
+    bucket_spec = input("Time bucket for an event ID histogram, e.g. 15m, 1h or 1d (leave empty to skip): ").strip()
+    heatmap = bucket_spec and input("Also save a heat map PNG? (y/N): ").strip().lower() == "y"
+
     try:
-        # Load JSON data from the selected file
-        with open(input_file, 'r') as file:
-            data = json.load(file)
+        histogram = new_histogram(parse_bucket(bucket_spec)) if bucket_spec else None
 
-        # Extract and count occurrences of 'winlog.event id'
-        event_ids = extract_event_ids(data)
-        event_id_counts = Counter(event_ids)
+        # Stream the selected file and count occurrences of 'winlog.event id' without loading it
+        with open_text(input_file) as file:
+            event_id_counts = count_event_ids(file, histogram=histogram)
 
         # Write counts to the selected CSV file
-        with open(output_file, 'w', newline='') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(['Event ID', 'Count'])
-            for event_id, count in event_id_counts.items():
-                writer.writerow([event_id, count])
+        write_counts_csv(output_file, event_id_counts)
 
         print(f"CSV output successfully saved to: {output_file}")
+
+        if histogram:
+            histogram_file, heatmap_file = histogram_paths(output_file, bucket_spec, heatmap)
+            write_histogram(flush_histogram(histogram), histogram["bucket_ms"], histogram_file, heatmap_file)
     except Exception as e:
         print(f"An error occurred: {e}")
 
 if __name__ == "__main__":
+    if sys.argv[1:]:
+        sys.exit(batch_main(sys.argv[1:]))
     main()
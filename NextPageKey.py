@@ -1,29 +1,285 @@
 import requests
+import gzip
 import json
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from tkinter import Tk, filedialog
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-# Function to fetch data with pagination
-def fetch_data_with_pagination(api_url, headers):
-    all_data = []
-    next_page_key = None
+MAX_RATE_LIMIT_RETRIES = 5
+RELATIVE_TIME = re.compile(r"^now(?:-(\d+)([smhdw]))?$")
+UNIT_MS = {"s": 1000, "m": 60 * 1000, "h": 3600 * 1000, "d": 86400 * 1000, "w": 7 * 86400 * 1000}
 
+# Function to walk the export one page at a time
+def iter_pages(api_url, headers, next_page_key=None, session=None):
+    http = session or requests
     while True:
         url = api_url if not next_page_key else f"{api_url}&nextPageKey={next_page_key}"
         print(f"Fetching data from: {url}")  # Debugging URL
 
-        response = requests.get(url, headers=headers)
+        response = http.get(url, headers=headers)
+        retries = 0
+        while response.status_code == 429 and retries < MAX_RATE_LIMIT_RETRIES:
+            # Rate limited: wait as long as the tenant asks (or back off) and retry the same page
+            retries += 1
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else float(retries)
+            print(f"Rate limited (429). Retrying in {delay:.0f}s...")
+            time.sleep(delay)
+            response = http.get(url, headers=headers)
         response.raise_for_status()
         data = response.json()
 
-        if 'items' in data:
-            all_data.extend(data['items'])
-
         next_page_key = data.get('nextPageKey')
+        yield data
+
         if not next_page_key:
             break
 
+# Function to fetch data with pagination
+def fetch_data_with_pagination(api_url, headers):
+    all_data = []
+
+    for data in iter_pages(api_url, headers):
+        if 'items' in data:
+            all_data.extend(data['items'])
+
     return all_data
 
+def encode_page(items, compress=False):
+    """
+    Encodes one page of items as NDJSON lines (one compact JSON object per line).
+    With compress=True the page becomes its own gzip member; concatenated members are a valid .gz file,
+    so the output stays readable while it grows and can be cut back to any page boundary.
+    """
+    data = "".join(json.dumps(item, separators=(',', ':'), ensure_ascii=False) + "\n" for item in items).encode('utf-8')
+    if compress and data:
+        return gzip.compress(data, compresslevel=6)  # Level 6: close to 9's ratio at a fraction of the CPU
+    return data
+
+def checkpoint_path_for(save_path):
+    return save_path + ".checkpoint"
+
+def load_checkpoint(save_path, api_url):
+    """Returns the checkpoint of an unfinished export to save_path, or None to start from page 1."""
+    checkpoint_path = checkpoint_path_for(save_path)
+    if not os.path.exists(checkpoint_path):
+        return None
+
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as file:
+            checkpoint = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+        return None
+
+    if checkpoint.get("api_url") != api_url:
+        print(f"Checkpoint {checkpoint_path} belongs to a different export. Starting from page 1.")
+        return None
+    if not os.path.exists(save_path) or os.path.getsize(save_path) < checkpoint.get("offset", 0):
+        print(f"Output file is missing or shorter than checkpoint {checkpoint_path}. Starting from page 1.")
+        return None
+
+    return checkpoint
+
+def save_checkpoint(save_path, api_url, next_page_key, records, offset):
+    """Atomically records the last committed page: the key of the next page, records written and output size."""
+    checkpoint_path = checkpoint_path_for(save_path)
+    temp_path = checkpoint_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump({"api_url": api_url, "next_page_key": next_page_key, "records": records, "offset": offset}, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, checkpoint_path)
+
+def remove_checkpoint(save_path):
+    checkpoint_path = checkpoint_path_for(save_path)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+# Function to stream each page to an NDJSON file as it arrives
+def export_ndjson_with_pagination(api_url, headers, save_path, prefetch_pages=4, resume=True):
+    """
+    Appends every page's items to save_path as soon as the page arrives, so memory stays at about
+    one page and the first records can be read while the export is still running.
+    The fetcher (this thread) requests page N+1 as soon as page N's nextPageKey is known, while a
+    writer thread serializes page N; at most prefetch_pages pages wait in between.
+    After each page the writer commits a checkpoint (<save_path>.checkpoint). With resume=True a rerun
+    truncates anything written after the last checkpoint and continues from its nextPageKey.
+    Returns the number of records written.
+    """
+    compress = save_path.endswith(".gz")
+    checkpoint = load_checkpoint(save_path, api_url) if resume else None
+    start_key = checkpoint["next_page_key"] if checkpoint else None
+    progress = {"records": checkpoint["records"] if checkpoint else 0, "error": None}
+    if checkpoint:
+        print(f"Resuming export after {progress['records']} records (checkpoint: {checkpoint_path_for(save_path)})")
+
+    pages = queue.Queue(maxsize=max(1, prefetch_pages))
+
+    def writer():
+        try:
+            with open(save_path, 'r+b' if checkpoint else 'wb') as file:
+                if checkpoint:
+                    # Drop any partial tail written after the last committed page
+                    file.truncate(checkpoint["offset"])
+                    file.seek(checkpoint["offset"])
+
+                while True:
+                    page = pages.get()
+                    if page is None:
+                        break
+                    items, next_page_key = page
+
+                    file.write(encode_page(items, compress))
+                    file.flush()  # Make the page visible to readers
+                    os.fsync(file.fileno())  # The checkpoint must never point past data that is on disk
+                    progress["records"] += len(items)
+
+                    if next_page_key:
+                        save_checkpoint(save_path, api_url, next_page_key, progress["records"], file.tell())
+                    else:
+                        remove_checkpoint(save_path)  # Last page written: the export is complete
+                    print(f"Saved {progress['records']} records so far")
+        except Exception as e:
+            progress["error"] = e
+            # Keep draining so the fetcher never blocks on a full queue
+            while pages.get() is not None:
+                pass
+
+    writer_thread = threading.Thread(target=writer, name="ndjson-writer", daemon=True)
+    writer_thread.start()
+
+    try:
+        with requests.Session() as session:  # Reuse one connection for the whole chain
+            for data in iter_pages(api_url, headers, next_page_key=start_key, session=session):
+                pages.put((data.get('items', []), data.get('nextPageKey')))
+                if progress["error"]:
+                    break
+    finally:
+        pages.put(None)
+        writer_thread.join()
+
+    if progress["error"]:
+        raise progress["error"]
+
+    return progress["records"]
+
+def parse_time_ms(value, now_ms):
+    """
+    Converts a Dynatrace from/to value to epoch milliseconds: epoch ms, "now", "now-<n><s|m|h|d|w>"
+    or an ISO 8601 timestamp (UTC when no offset is given).
+    """
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+
+    match = RELATIVE_TIME.match(value)
+    if match:
+        amount, unit = match.groups()
+        return now_ms - (int(amount) * UNIT_MS[unit] if amount else 0)
+
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+def split_time_range(api_url, slices):
+    """
+    Splits the URL's from/to range into up to `slices` consecutive [from, to) windows and returns one URL per window.
+    Relative times are resolved once so every slice covers a fixed window; a missing from/to defaults to now-2h/now
+    like the API does.
+    """
+    parts = urlsplit(api_url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    values = dict(params)
+    now_ms = int(time.time() * 1000)
+    start_ms = parse_time_ms(values.get("from", "now-2h"), now_ms)
+    end_ms = parse_time_ms(values.get("to", "now"), now_ms)
+    if end_ms <= start_ms:
+        raise ValueError(f"Empty time range: from={values.get('from')} to={values.get('to')}")
+
+    slices = max(1, min(slices, end_ms - start_ms))
+    bounds = [start_ms + (end_ms - start_ms) * i // slices for i in range(slices + 1)]
+    other_params = [(key, value) for key, value in params if key not in ("from", "to")]
+
+    return [
+        urlunsplit(parts._replace(query=urlencode(other_params + [("from", str(bounds[i])), ("to", str(bounds[i + 1]))])))
+        for i in range(slices)
+    ]
+
+def record_timestamp(item):
+    return item.get("timestamp") or 0
+
+def export_slice(slice_url, headers, part_path):
+    """
+    Paginates one time slice into an uncompressed NDJSON part file.
+    Returns (record count, whether the records arrived in ascending timestamp order).
+    """
+    record_count = 0
+    in_order = True
+    last_timestamp = None
+
+    with requests.Session() as session, open(part_path, 'wb') as file:
+        for data in iter_pages(slice_url, headers, session=session):
+            items = data.get('items', [])
+            for item in items:
+                timestamp = record_timestamp(item)
+                if last_timestamp is not None and timestamp < last_timestamp:
+                    in_order = False
+                last_timestamp = timestamp
+            file.write(encode_page(items))
+            record_count += len(items)
+
+    return record_count, in_order
+
+def export_ndjson_time_sliced(api_url, headers, save_path, slices=8, workers=4, merge_batch_bytes=1024 * 1024):
+    """
+    Splits the URL's from/to range into time slices, paginates up to `workers` slices concurrently
+    and merges the slices into save_path in timestamp order (gzip-compressed when it ends in .gz).
+    Slices are disjoint and consecutive, so the merge is a concatenation; a slice whose records did
+    not arrive in ascending order is sorted in memory first, so more slices also means less memory.
+    Returns the number of records written.
+    """
+    slice_urls = split_time_range(api_url, slices)
+    compress = save_path.endswith(".gz")
+    part_dir = tempfile.mkdtemp(prefix="log-export-", dir=os.path.dirname(os.path.abspath(save_path)))
+
+    try:
+        part_paths = [os.path.join(part_dir, f"slice-{i:05d}.ndjson") for i in range(len(slice_urls))]
+        print(f"Exporting {len(slice_urls)} time slices with up to {workers} in flight...")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(export_slice, slice_urls, [headers] * len(slice_urls), part_paths))
+
+        # Merge the slices in time order, in batches (one gzip member per batch)
+        record_count = 0
+        with open(save_path, 'wb') as output:
+            for part_path, (part_records, in_order) in zip(part_paths, results):
+                with open(part_path, 'rb') as part:
+                    if in_order:
+                        while True:
+                            batch = part.read(merge_batch_bytes)
+                            if not batch:
+                                break
+                            batch += part.readline()  # End the batch on a record boundary
+                            output.write(gzip.compress(batch, compresslevel=6) if compress else batch)
+                    else:
+                        items = sorted((json.loads(line) for line in part), key=record_timestamp)
+                        output.write(encode_page(items, compress))
+                record_count += part_records
+                os.remove(part_path)  # Free the disk space as soon as the slice is merged
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    return record_count
+
 def main():
     # Suppress root Tkinter window
     Tk().withdraw()
@@ -32,18 +288,41 @@ def main():
     api_url = input("Enter the Dynatrace API URL (e.g., https://<tenant>/api/v2/logs/export): ").strip()
     api_token = input("Enter your API Token: ").strip()
 
+    # Output format: one pretty-printed JSON array (held in memory) or streamed NDJSON
+    output_format = input("Output format - json or ndjson (leave empty for json): ").strip().lower() or "json"
+    if output_format not in ("json", "ndjson"):
+        print(f"Unknown output format '{output_format}'. Using json.")
+        output_format = "json"
+
     # Select save location
-    print("Please select a location to save the JSON file.")
-    save_path = filedialog.asksaveasfilename(
-        title="Save JSON Output As",
-        defaultextension=".json",
-        filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
-    )
+    print(f"Please select a location to save the {output_format.upper()} file.")
+    if output_format == "ndjson":
+        save_path = filedialog.asksaveasfilename(
+            title="Save NDJSON Output As",
+            defaultextension=".ndjson",
+            filetypes=[("NDJSON Files", "*.ndjson"), ("Gzipped NDJSON Files", "*.ndjson.gz"), ("All Files", "*.*")]
+        )
+    else:
+        save_path = filedialog.asksaveasfilename(
+            title="Save JSON Output As",
+            defaultextension=".json",
+            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
+        )
 
     if not save_path:
         print("No file selected. Exiting...")
         return
 
+    # Time-sliced parallel export (NDJSON only)
+    slices = 1
+    workers = 4
+    if output_format == "ndjson":
+        slices_input = input("Number of time slices to export in parallel (leave empty for one sequential, resumable export): ").strip()
+        slices = int(slices_input) if slices_input.isdigit() and int(slices_input) > 0 else 1
+        if slices > 1:
+            workers_input = input("Max slices in flight at once - keep within the tenant's rate limit (leave empty for 4): ").strip()
+            workers = int(workers_input) if workers_input.isdigit() and int(workers_input) > 0 else 4
+
     # Set headers
     headers = {
         "Authorization": f"Api-Token {api_token}",
@@ -51,6 +330,18 @@ def main():
     }
 
     try:
+        if output_format == "ndjson" and slices > 1:
+            # Paginate time slices concurrently and merge them in timestamp order
+            record_count = export_ndjson_time_sliced(api_url, headers, save_path, slices, workers)
+            print(f"{record_count} records successfully saved to: {save_path}")
+            return
+
+        if output_format == "ndjson":
+            # Stream each page straight to disk
+            record_count = export_ndjson_with_pagination(api_url, headers, save_path)
+            print(f"{record_count} records successfully saved to: {save_path}")
+            return
+
         # Fetch data using pagination
         all_data = fetch_data_with_pagination(api_url, headers)
 
@@ -61,6 +352,8 @@ def main():
         print(f"Data successfully saved to: {save_path}")
     except Exception as e:
         print(f"An error occurred: {e}")
+        if output_format == "ndjson" and os.path.exists(checkpoint_path_for(save_path)):
+            print("Rerun with the same API URL and output file to resume from the last saved page.")
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,10 @@ from io import BytesIO
 import matplotlib.pyplot as plt
 import pandas as pd
 from datetime import datetime
+import json
+import os
+import shutil
+import tempfile
 from tkinter import Tk, filedialog
 
 # Define thresholds for green, yellow, red
@@ -40,13 +44,44 @@ def create_chart(chart_data, title, metric_name):
     chart_stream.seek(0)
     return chart_stream
 
+# Hosts laid out per partial PDF: reportlab keeps every image of a document in memory until the document is saved
+HOSTS_PER_BATCH = 20
+
+def build_pdf_in_batches(output_filename, batches):
+    """
+    Build each list of flowables from batches into its own partial PDF, then merge them into output_filename.
+    Only one batch of chart images is in memory at a time; pikepdf reads the page content back from the
+    partial files while it writes the merged report, instead of loading them all first.
+    """
+    import pikepdf  # NOTES: Optional. Python bindings for qpdf, pip install pikepdf
+
+    scratch_dir = tempfile.mkdtemp(prefix="agg_pdf_batches_")
+    try:
+        partial_pdfs = []
+        for index, elements in enumerate(batches):
+            partial_pdf = os.path.join(scratch_dir, f"batch_{index:04d}.pdf")
+            SimpleDocTemplate(partial_pdf, pagesize=letter).build(elements)
+            partial_pdfs.append(partial_pdf)
+
+        sources = [pikepdf.open(partial_pdf) for partial_pdf in partial_pdfs]
+        try:
+            with pikepdf.new() as merged:
+                for source in sources:
+                    merged.pages.extend(source.pages)
+                merged.save(output_filename)
+        finally:
+            for source in sources:
+                source.close()
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
 def generate_pdf_report(aggregated_data, management_zone, start_time, metrics, output_filename):
     """
     Generate a PDF report with a title block and embedded line charts.
+    With pikepdf installed, hosts are laid out HOSTS_PER_BATCH at a time into partial PDFs that are merged at the
+    end, so memory stays at about one batch of charts whatever the host count (each batch starts on a new page).
+    Without it the whole report is built in one pass.
     """
-    pdf = SimpleDocTemplate(output_filename, pagesize=letter)
-    elements = []
-
     styles = getSampleStyleSheet()
     title_style = styles['Heading2']
     text_style = styles['Normal']
@@ -63,43 +98,121 @@ def generate_pdf_report(aggregated_data, management_zone, start_time, metrics, o
         Paragraph(f"<b>Resources:</b> {', '.join(metrics)}", text_style),
         Spacer(1, 24)
     ]
-    elements.extend(title_block)
-
-    for dimension, df in aggregated_data.items():
-        elements.append(Paragraph(f"<b>{dimension}</b>", style=title_style))
-        elements.append(Spacer(1, 24))
 
+    def host_elements(dimension, df):
+        elements = [Paragraph(f"<b>{dimension}</b>", style=title_style), Spacer(1, 24)]
         for metric_name in df.columns:
             if metric_name not in ['Dimension', 'Time']:
                 chart_stream = create_chart(df, f"{metric_name} Trend for {dimension}", metric_name)
                 img = Image(chart_stream, width=500, height=250)
-                elements.append(img)
-                elements.append(Spacer(1, 24))
+                elements.extend([img, Spacer(1, 24)])
 
         elements.append(Spacer(1, 24))
-
-    pdf.build(elements)
+        return elements
+
+    def batches():
+        elements = title_block
+        for index, (dimension, df) in enumerate(aggregated_data.items(), start=1):
+            elements.extend(host_elements(dimension, df))
+            if index % HOSTS_PER_BATCH == 0:
+                yield elements
+                elements = []
+        if elements:
+            yield elements
+
+    try:
+        import pikepdf  # NOTES: Optional. Only needed to build in batches
+    except ImportError:
+        pikepdf = None
+    if pikepdf is None or len(aggregated_data) <= HOSTS_PER_BATCH:
+        if len(aggregated_data) > HOSTS_PER_BATCH:
+            print("Install pikepdf to build large reports in batches with less memory.")
+        SimpleDocTemplate(output_filename, pagesize=letter).build([element for batch in batches() for element in batch])
+    else:
+        build_pdf_in_batches(output_filename, batches())
     print(f"PDF report saved to {output_filename}")
 
-def aggregate_data_from_existing_report(file_path):
+# Bump when the aggregated structure changes so old sidecar caches are ignored
+AGGREGATE_CACHE_VERSION = 2
+
+def load_aggregate_cache(file_path, source_key):
     """
-    Read the existing Excel file and aggregate data for identical Dimensions across tabs.
+    Return the aggregated data saved by save_aggregate_cache, or None if there is no cache for this exact workbook.
+    The cache is plain data (a parquet file plus a JSON manifest), so loading it can never run code.
     """
-    df_dict = pd.read_excel(file_path, sheet_name=None)
+    manifest_path = f"{file_path}.agg-cache.json"
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        if manifest.get("source") != list(source_key):
+            return None
+        frame = pd.read_parquet(f"{file_path}.agg-cache.parquet")
+    except Exception as e:
+        print(f"Ignoring unreadable cache {manifest_path}: {e}")
+        return None
+
     aggregated_data = {}
+    row = 0
+    for entry in manifest["dimensions"]:
+        # Each dimension is a run of rows in the saved frame; restore its own columns and dtypes
+        part = frame.iloc[row:row + entry["rows"]][entry["columns"]].reset_index(drop=True)
+        part = part.astype(dict(zip(entry["columns"], entry["dtypes"])))
+        aggregated_data[part["Dimension"].iloc[0]] = part
+        row += entry["rows"]
+    print(f"Using cached data from {manifest_path}")
+    return aggregated_data
+
+def save_aggregate_cache(file_path, source_key, aggregated_data):
+    """
+    Save aggregated data next to the workbook: all frames in one <file>.agg-cache.parquet (needs pyarrow)
+    and their order, columns and dtypes in <file>.agg-cache.json. The manifest is written last.
+    """
+    manifest = {
+        "source": list(source_key),
+        "dimensions": [{"rows": len(df), "columns": [str(column) for column in df.columns],
+                        "dtypes": [str(dtype) for dtype in df.dtypes]} for df in aggregated_data.values()],
+    }
+    try:
+        pd.concat(aggregated_data.values(), ignore_index=True).to_parquet(f"{file_path}.agg-cache.parquet")
+        with open(f"{file_path}.agg-cache.json", "w") as file:
+            json.dump(manifest, file)
+    except ImportError:
+        print("Install pyarrow to cache parsed workbooks between runs.")
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Could not write cache for {file_path}: {e}")
+
+def aggregate_data_from_existing_report(file_path, use_cache=True):
+    """
+    Read the existing Excel file and aggregate data for identical Dimensions across tabs.
+    Each sheet is split by Dimension in one groupby pass (rows without a Dimension are kept together under NaN).
+    The result is saved next to the workbook as a parquet sidecar cache (see save_aggregate_cache), so
+    re-rendering the same, unchanged export skips Excel parsing.
+    """
+    source_stat = os.stat(file_path)
+    source_key = (AGGREGATE_CACHE_VERSION, source_stat.st_size, source_stat.st_mtime_ns)
+    if use_cache:
+        cached = load_aggregate_cache(file_path, source_key)
+        if cached is not None:
+            return cached
 
-    for sheet_name, df in df_dict.items():
-        if 'Dimension' not in df.columns:
-            continue
-        for dimension in df['Dimension'].unique():
-            if dimension not in aggregated_data:
-                aggregated_data[dimension] = []
-            dimension_data = df[df['Dimension'] == dimension]
-            aggregated_data[dimension].append(dimension_data)
+    aggregated_data = {}
+    # The openpyxl engine opens the workbook read-only and streams each sheet; sheets are parsed one at a time
+    with pd.ExcelFile(file_path, engine="openpyxl") as workbook:
+        for sheet_name in workbook.sheet_names:
+            df = workbook.parse(sheet_name)
+            if 'Dimension' not in df.columns:
+                continue  # Skip sheets without the Dimension column
+            for dimension, dimension_data in df.groupby('Dimension', sort=False, dropna=False):
+                aggregated_data.setdefault(dimension, []).append(dimension_data)
 
     for dimension in aggregated_data:
         aggregated_data[dimension] = pd.concat(aggregated_data[dimension], ignore_index=True)
 
+    if use_cache and aggregated_data:
+        save_aggregate_cache(file_path, source_key, aggregated_data)
+
     return aggregated_data
 
 def main():
@@ -1,10 +1,15 @@
 import requests
 import pandas as pd
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.chart import Reference, ScatterChart, Series
+from openpyxl.drawing.image import Image
 from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
 from io import BytesIO
-import matplotlib.pyplot as plt
 from datetime import datetime
+import json
+import os
 from tkinter import Tk, filedialog
 
 # Define thresholds for green, yellow, red
@@ -32,6 +37,8 @@ def create_chart(chart_data, title, metric_name):
     """
     Create a line chart for a given metric and save it to a BytesIO stream.
     """
+    import matplotlib.pyplot as plt  # Only loaded when image charts are requested
+
     plt.figure(figsize=(8, 4))
     plt.plot(chart_data['Time'], chart_data[metric_name], marker='o', linestyle='-', color='blue', label=metric_name)
     plt.title(title)
@@ -49,9 +56,34 @@ def create_chart(chart_data, title, metric_name):
     chart_stream.seek(0)
     return chart_stream
 
+def create_native_chart(sheet, columns, metric_name, num_rows, title):
+    """
+    Create a native Excel line chart for a metric, referencing the Time and metric columns already written
+    to the sheet (header in row 1, data in rows 2..num_rows+1). No rendering happens in Python.
+    """
+    time_col = columns.index('Time') + 1
+    metric_col = columns.index(metric_name) + 1
+
+    chart = ScatterChart()
+    chart.title = title
+    chart.style = 13
+    chart.x_axis.title = "Time"
+    chart.x_axis.number_format = "dd-mmm-yy hh:mm"
+    chart.y_axis.title = metric_name
+    chart.width, chart.height = 20, 10  # centimetres, roughly the 8x4 inch PNG it replaces
+
+    x_values = Reference(sheet, min_col=time_col, min_row=2, max_row=num_rows + 1)
+    y_values = Reference(sheet, min_col=metric_col, min_row=2, max_row=num_rows + 1)
+    series = Series(y_values, x_values, title=metric_name)
+    series.marker.symbol = "circle"
+    series.smooth = False
+    chart.series.append(series)
+    return chart
+
 def add_title_block(sheet, management_zone, start_time, metrics, num_servers):
     """
     Add a title block to the top of the first sheet with report details.
+    The sheet is write-only, so each line is appended as a bold WriteOnlyCell.
     """
     report_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     duration = "Weekly" if "1w" in start_time else "Daily" if "1d" in start_time else "Custom"
@@ -64,38 +96,137 @@ def add_title_block(sheet, management_zone, start_time, metrics, num_servers):
         f"Resources: {', '.join(metrics)}",
     ]
 
-    for idx, line in enumerate(title_content, start=1):
-        sheet.cell(row=idx, column=1, value=line)
-        sheet.cell(row=idx, column=1).font = Font(bold=True)
+    for line in title_content:
+        cell = WriteOnlyCell(sheet, value=line)
+        cell.font = Font(bold=True)
+        sheet.append([cell])
 
-def generate_excel_report(aggregated_data, management_zone, start_time, metrics, output_filename):
+def generate_excel_report(aggregated_data, management_zone, start_time, metrics, output_filename, chart_mode="native"):
     """
     Generate a new Excel report with a title block and line charts.
+    The workbook is write-only: each sheet's rows are streamed out in blocks of row_block rows,
+    converted from the DataFrame one block at a time, instead of being set cell by cell in memory.
+    chart_mode="native" adds native Excel charts over the written data (no matplotlib);
+    chart_mode="image" embeds a matplotlib PNG per metric as before.
     """
-    workbook = Workbook()
-    title_sheet = workbook.active
-    title_sheet.title = "Report Summary"
+    workbook = Workbook(write_only=True)
+    title_sheet = workbook.create_sheet(title="Report Summary")
 
     num_servers = len(aggregated_data)
     add_title_block(title_sheet, management_zone, start_time, metrics, num_servers)
 
+    row_block = 5000
     for dimension, df in aggregated_data.items():
         sheet = workbook.create_sheet(title=str(dimension)[:31])
 
-        for r_idx, row in enumerate(df.itertuples(index=False), start=1):
-            for c_idx, value in enumerate(row, start=1):
-                sheet.cell(row=r_idx, column=c_idx, value=value)
-
+        # Charts go to the right of the data, one below the other (about 22 rows per 8x4 inch chart)
+        chart_column = get_column_letter(len(df.columns) + 2)
+        chart_row = 1
         for metric_name in df.columns:
             if metric_name not in ['Dimension', 'Time']:
-                chart_stream = create_chart(df, f"{metric_name} Trend for {dimension}", metric_name)
+                title = f"{metric_name} Trend for {dimension}"
+                if chart_mode == "native":
+                    chart = create_native_chart(sheet, list(df.columns), metric_name, len(df), title)
+                    sheet.add_chart(chart, f"{chart_column}{chart_row}")
+                else:
+                    chart_stream = create_chart(df, title, metric_name)
+                    img = Image(chart_stream)
+                    sheet.add_image(img, f"{chart_column}{chart_row}")
+                chart_row += 22
 
-                img = Image(chart_stream)
-                sheet.add_image(img, f"B{r_idx + 2}")
+        sheet.append(list(df.columns))
+        for block_start in range(0, len(df), row_block):
+            # Only one block of rows is converted to Python values at a time, not the whole frame
+            block = df.iloc[block_start:block_start + row_block]
+            for row in zip(*(block[column].tolist() for column in block.columns)):
+                sheet.append(row)
 
     workbook.save(output_filename)
     print(f"Excel report saved to {output_filename}")
 
+# Bump when the aggregated structure changes so old sidecar caches are ignored
+AGGREGATE_CACHE_VERSION = 2
+
+def load_aggregate_cache(file_path, source_key):
+    """
+    Return the aggregated data saved by save_aggregate_cache, or None if there is no cache for this exact workbook.
+    The cache is plain data (a parquet file plus a JSON manifest), so loading it can never run code.
+    """
+    manifest_path = f"{file_path}.agg-cache.json"
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        if manifest.get("source") != list(source_key):
+            return None
+        frame = pd.read_parquet(f"{file_path}.agg-cache.parquet")
+    except Exception as e:
+        print(f"Ignoring unreadable cache {manifest_path}: {e}")
+        return None
+
+    aggregated_data = {}
+    row = 0
+    for entry in manifest["dimensions"]:
+        # Each dimension is a run of rows in the saved frame; restore its own columns and dtypes
+        part = frame.iloc[row:row + entry["rows"]][entry["columns"]].reset_index(drop=True)
+        part = part.astype(dict(zip(entry["columns"], entry["dtypes"])))
+        aggregated_data[part["Dimension"].iloc[0]] = part
+        row += entry["rows"]
+    print(f"Using cached data from {manifest_path}")
+    return aggregated_data
+
+def save_aggregate_cache(file_path, source_key, aggregated_data):
+    """
+    Save aggregated data next to the workbook: all frames in one <file>.agg-cache.parquet (needs pyarrow)
+    and their order, columns and dtypes in <file>.agg-cache.json. The manifest is written last.
+    """
+    manifest = {
+        "source": list(source_key),
+        "dimensions": [{"rows": len(df), "columns": [str(column) for column in df.columns],
+                        "dtypes": [str(dtype) for dtype in df.dtypes]} for df in aggregated_data.values()],
+    }
+    try:
+        pd.concat(aggregated_data.values(), ignore_index=True).to_parquet(f"{file_path}.agg-cache.parquet")
+        with open(f"{file_path}.agg-cache.json", "w") as file:
+            json.dump(manifest, file)
+    except ImportError:
+        print("Install pyarrow to cache parsed workbooks between runs.")
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Could not write cache for {file_path}: {e}")
+
+def aggregate_data_from_existing_report(file_path, use_cache=True):
+    """
+    Read the existing Excel file and aggregate data for identical Dimensions across tabs.
+    Each sheet is split by Dimension in one groupby pass (rows without a Dimension are kept together under NaN).
+    The result is saved next to the workbook as a parquet sidecar cache (see save_aggregate_cache), so
+    re-rendering the same, unchanged export skips Excel parsing.
+    """
+    source_stat = os.stat(file_path)
+    source_key = (AGGREGATE_CACHE_VERSION, source_stat.st_size, source_stat.st_mtime_ns)
+    if use_cache:
+        cached = load_aggregate_cache(file_path, source_key)
+        if cached is not None:
+            return cached
+
+    aggregated_data = {}
+    # The openpyxl engine opens the workbook read-only and streams each sheet; sheets are parsed one at a time
+    with pd.ExcelFile(file_path, engine="openpyxl") as workbook:
+        for sheet_name in workbook.sheet_names:
+            df = workbook.parse(sheet_name)
+            if 'Dimension' not in df.columns:
+                continue  # Skip sheets without the Dimension column
+            for dimension, dimension_data in df.groupby('Dimension', sort=False, dropna=False):
+                aggregated_data.setdefault(dimension, []).append(dimension_data)
+
+    for dimension in aggregated_data:
+        aggregated_data[dimension] = pd.concat(aggregated_data[dimension], ignore_index=True)
+
+    if use_cache and aggregated_data:
+        save_aggregate_cache(file_path, source_key, aggregated_data)
+
+    return aggregated_data
+
 def main():
     Tk().withdraw()
     print("Please select the existing Dynatrace report file (Excel).")
@@ -107,22 +238,23 @@ def main():
     management_zone = input("Enter the Management Zone: ").strip()
     start_time = "now-1w"
     metrics = {
-        "Processor": "builtin:host.cpu.usage",
-        "Memory": "builtin:host.mem.usage",
-        "Average Disk Used Percentage": "builtin:host.disk.usedPct",
-        "Average Disk Utilization Time": "builtin:host.disk.utilTime",
-        "Disk Write Time Per Second": "builtin:host.disk.writeTime",
-        "Average Disk Queue Length": "builtin:host.disk.queueLength",
-        "Network Adapter In": "builtin:host.net.nic.trafficIn",
-        "Network Adapter Out": "builtin:host.net.nic.trafficOut"
-    }
+        "Processor": "builtin:host.cpu.usage",
+        "Memory": "builtin:host.mem.usage",
+        "Average Disk Used Percentage": "builtin:host.disk.usedPct",
+        "Average Disk Utilization Time": "builtin:host.disk.utilTime",
+        "Disk Write Time Per Second": "builtin:host.disk.writeTime",
+        "Average Disk Queue Length": "builtin:host.disk.queueLength",
+        "Network Adapter In": "builtin:host.net.nic.trafficIn",
+        "Network Adapter Out": "builtin:host.net.nic.trafficOut"
+    }
 
     print("Aggregating data from the existing report...")
     aggregated_data = aggregate_data_from_existing_report(file_path)
 
     output_filename = f"{management_zone.replace(':', '').replace(' ', '_')}-Aggregated_Dynatrace_Report-{datetime.now().strftime('%Y%m%d')}.xlsx"
+    chart_mode = input("Enter Chart Type - native or image (leave empty for native): ").strip().lower() or "native"
     print("Generating the Excel report...")
-    generate_excel_report(aggregated_data, management_zone, start_time, metrics, output_filename)
+    generate_excel_report(aggregated_data, management_zone, start_time, metrics, output_filename, chart_mode)
     print(f"Report saved to {output_filename}")
 
 if __name__ == "__main__":
@@ -1,18 +1,29 @@
+import time  # NOTES: Used for timing and ETA calculation. Imported first so startup time can be measured.
+STARTUP_BEGIN = time.perf_counter()
+
 import requests  # This is the internets errand boy. It is used to fetch stuff from URLs and we are using it in part to query the API URL
-import matplotlib.pyplot as plt  # This is the artist. We are using it to draw the charts ref -https://matplotlib.org/-
-from matplotlib.dates import DateFormatter, date2num  # Helps make time stuff readable converts this format like 17377632000, to 9/3/2520, 8:00:00 PM
 from io import BytesIO  # Digital notepad for storing datas
-from reportlab.pdfgen import canvas  # This is the PDF Architect
-from reportlab.lib.pagesizes import letter  # Manages Page Size and specific standards
-from matplotlib.ticker import FormatStrFormatter  # Used to work with scientific numbering issues
+# NOTES: matplotlib (the artist), PIL and reportlab (the PDF Architect) are NOT imported up here.
+# They take seconds to load, so they are imported inside the functions that use them and only get
+# loaded once the charting/PDF stage actually starts. See load_pyplot() and create_pdf().
 from datetime import datetime  # Official TIme Keeper. In case some date/time issues still need working on, this is the gladiator
 import logging  # Every good engineer needs logging. And so I included it
-import tempfile  # To pull, read, manipulate the datas from where we get them to where they go, this is that temp space
+import importlib  # Loads PIL and reportlab ahead of time for --prewarm
+import hashlib  # Fingerprints each chart so a repeated chart is only counted once towards a volume's size
+import json  # Turns chart inputs into a stable string for the chart cache key
+import os  # Chart cache directory housekeeping
+import shutil  # Cleans up the partial PDFs left by sharded generation, finds the qpdf command
+import subprocess  # Runs qpdf to linearize reports when pikepdf is not installed
+import tempfile  # Scratch folder for the partial PDFs of sharded generation
+from concurrent.futures import ProcessPoolExecutor, as_completed  # Renders PDF shards on all cores
+import csv  # Writes the volume index when a report is split into several PDFs
+import html  # Escapes host and metric names for the HTML report
 import re  # My "Bounder" Kicks out unwanted characters EX: ABC: BVCX_1234 kicks out that : and puts in an _ in its place
+import math  # Rounds the per-chart size budget to stable steps
 
-# NEW: Import sys and time for progress indicator and timing logic
+# NEW: Import sys for progress indicator (time is imported at the very top)
 import sys  # NOTES: Used for outputting progress in the same line.
-import time  # NOTES: Used for timing and ETA calculation.
+import zlib  # Estimates the embedded size of PNG charts when splitting a report into volumes by MB
 
 # Configure logging with timestamp in filename
 log_filename = f"MetricAPI2PDF_debug_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
@@ -43,6 +54,74 @@ y_label_map = {
     "Network Adapter Out": "MB per sec"
 }
 
+# Size of a single metric chart in inches, also part of the chart cache key
+GRAPH_FIGSIZE = (8, 4)
+
+# Bump this whenever plot_metric/generate_graph styling changes so cached charts get re-rendered
+CHART_STYLE_VERSION = "v8.1"
+
+# Output profiles trade PDF size against chart sharpness.
+#   dpi              - raster resolution of every chart
+#   format           - "png" (lossless), "png8" (palette-quantized PNG) or "jpeg"
+#   quality          - JPEG quality, also the starting point when a size budget forces re-encoding
+#   colors           - palette size for "png8"
+output_profiles = {
+    "draft": {"dpi": 72, "format": "jpeg", "quality": 60, "colors": 32},
+    "standard": {"dpi": 100, "format": "png8", "quality": 85, "colors": 64},
+    "archival": {"dpi": 200, "format": "png", "quality": 95, "colors": 256},
+}
+
+# When squeezing charts into a size budget, never go below these
+MIN_BUDGET_DPI = 50
+MIN_BUDGET_QUALITY = 30
+
+# Per-chart budgets are rounded down to one of this many steps per doubling, so adding or dropping a host does not
+# change every budget (and with it every chart cache key). With 4 steps a chart gets at most ~16% less than its share.
+BUDGET_STEPS_PER_DOUBLING = 4
+
+def budget_bucket(max_bytes):
+    """
+    Round a per-chart byte budget down to the nearest step, keeping it stable across small changes
+    in the number of charts.
+    """
+    if max_bytes < 1:
+        return 1
+    step = math.floor(math.log2(max_bytes) * BUDGET_STEPS_PER_DOUBLING + 1e-9)
+    return int(2 ** (step / BUDGET_STEPS_PER_DOUBLING))
+
+def load_pyplot():
+    """
+    Import matplotlib.pyplot on first use instead of at startup, pinned to the headless Agg backend.
+    After the first call this is just a lookup of the already-imported module.
+    """
+    import matplotlib
+    matplotlib.use("Agg")  # NOTES: No GUI toolkit needed, charts only ever go to in-memory buffers
+    import matplotlib.pyplot as plt
+    return plt
+
+def prewarm():
+    """
+    Load the heavy libraries once and build the matplotlib font cache ahead of time
+    (e.g. while building a container image) so the first real report does not pay for it.
+    Prints how long each stage took.
+    """
+    stage_start = time.perf_counter()
+    plt = load_pyplot()
+    import matplotlib
+    from matplotlib import font_manager
+    font_manager.findfont("DejaVu Sans")  # Forces the font cache to be built if it is missing
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.set_title("warm-up")
+    fig.savefig(BytesIO(), format='png')  # Exercises text rendering so glyph caches are warm too
+    plt.close(fig)
+    print(f"matplotlib + font cache: {time.perf_counter() - stage_start:.2f}s (cache dir: {matplotlib.get_cachedir()})")
+
+    stage_start = time.perf_counter()
+    # Imported only to pay the module load cost here instead of in the first report
+    importlib.import_module("PIL.Image")
+    importlib.import_module("reportlab.pdfgen.canvas")
+    print(f"PIL + reportlab: {time.perf_counter() - stage_start:.2f}s")
+
 def print_progress(current, total, start_time, prefix='Progress'):
     """
     Prints a progress bar with percentage complete, elapsed time, and estimated time remaining.
@@ -186,7 +265,93 @@ def group_data(raw_data, api_url, headers):
     logging.debug(f"Grouped Data: {grouped_data}")
     return grouped_data
 
-def generate_graph(timestamps, values, metric_name):
+def scale_values(values, metric_name):
+    """
+    Apply the unit scaling each metric needs before plotting. Missing (None) values plot as 0.
+    """
+    if metric_name == "Processor":
+        return [v * 100 if v is not None else 0 for v in values]  # Scale processor values to percentage
+    elif metric_name == "Disk Write Time Per Second":
+        return [v * 10 if v is not None else 0 for v in values]
+    elif metric_name in ["Network Adapter In", "Network Adapter Out"]:
+        return [v / 1024 if v is not None else 0 for v in values]
+    return values
+
+def plot_metric(ax, timestamps, values, metric_name, legend_size="medium"):
+    """
+    Draw one metric series onto the given axes with the report's standard styling.
+    """
+    datetime_timestamps = [datetime.fromtimestamp(ts / 1000) for ts in timestamps]
+    values = scale_values(values, metric_name)
+
+    ax.plot(datetime_timestamps, values, label=metric_name, marker='o', color='blue')
+    ax.set_title(metric_name)
+    ax.set_xlabel("")
+    # If metric_name is "Average Disk Used Percentage - DISK-XXXX", use "Average Disk Used Percentage"
+    base_metric_name = metric_name.split(" - ")[0]
+    ax.set_ylabel(y_label_map.get(base_metric_name, "millisecond"))
+
+    ax.grid(True)
+    ax.legend(
+        loc="upper right",
+        fontsize=legend_size,
+        borderaxespad=1.5,
+        labelspacing=1.0
+    )
+
+    from matplotlib.dates import DateFormatter  # Helps make time stuff readable converts this format like 17377632000, to 9/3/2520, 8:00:00 PM
+    from matplotlib.ticker import FormatStrFormatter  # Used to work with scientific numbering issues
+
+    ax.xaxis.set_major_formatter(DateFormatter("%d-%b-%y"))
+    ax.tick_params(axis='x', labelrotation=15)
+
+    if metric_name in ["Network Adapter In", "Network Adapter Out"]:
+        ax.ticklabel_format(style='plain', axis='y')
+        ax.yaxis.set_major_formatter(FormatStrFormatter('%.1f'))
+
+def encode_figure(fig, profile, max_bytes=None):
+    """
+    Rasterize a figure according to an output profile.
+    If max_bytes is given and the image is too big, switch to JPEG, then lower the JPEG quality, then lower the DPI
+    until it fits (or bottoms out). PNGs go first because reportlab re-compresses them as raw RGB, so their real
+    cost in the PDF is larger than the PNG size.
+    """
+    from PIL import Image as PILImage  # Ships with matplotlib. Used to palette-quantize PNGs for smaller reports
+
+    image_format = profile["format"]
+    dpi = profile["dpi"]
+    quality = profile["quality"]
+    while True:
+        buffer = BytesIO()
+        if image_format == "jpeg":
+            fig.savefig(buffer, format='jpeg', dpi=dpi, pil_kwargs={"quality": quality, "optimize": True})
+        elif image_format == "png8":
+            raw = BytesIO()
+            fig.savefig(raw, format='png', dpi=dpi)
+            raw.seek(0)
+            with PILImage.open(raw) as img:
+                img.convert("RGB").quantize(colors=profile["colors"]).save(buffer, format="PNG", optimize=True)
+        else:
+            fig.savefig(buffer, format='png', dpi=dpi)
+
+        size = buffer.getbuffer().nbytes
+        if not max_bytes or size <= max_bytes:
+            break
+        if image_format != "jpeg":
+            image_format = "jpeg"
+        elif quality > MIN_BUDGET_QUALITY:
+            quality = max(MIN_BUDGET_QUALITY, quality - 15)
+        elif dpi > MIN_BUDGET_DPI:
+            # Bytes grow roughly with pixel count (dpi squared), so jump straight to the DPI that should fit
+            dpi = max(MIN_BUDGET_DPI, int(dpi * min(0.8, (max_bytes / size) ** 0.5)))
+        else:
+            logging.warning(f"Chart is {size} bytes, over its {max_bytes} byte budget even at minimum quality.")
+            break
+
+    buffer.seek(0)
+    return buffer
+
+def generate_graph(timestamps, values, metric_name, profile=None, max_bytes=None):
     """
     Generate a graph for the given metric, applying necessary scaling adjustments.
     """
@@ -195,50 +360,48 @@ def generate_graph(timestamps, values, metric_name):
             logging.warning(f"Cannot generate graph for metric '{metric_name}': Missing or invalid data.")
             return None
 
-        datetime_timestamps = [datetime.fromtimestamp(ts / 1000) for ts in timestamps]
-
-        # Apply scaling for specific metrics:
-        if metric_name == "Processor":
-            values = [v * 100 if v is not None else 0 for v in values]  # Scale processor values to percentage
-        elif metric_name == "Disk Write Time Per Second":
-            values = [v * 10 if v is not None else 0 for v in values]
-        elif metric_name in ["Network Adapter In", "Network Adapter Out"]:
-            values = [v / 1024 if v is not None else 0 for v in values]
-
-        plt.figure(figsize=(8, 4))
-        plt.plot(datetime_timestamps, values, label=metric_name, marker='o', color='blue')
-        plt.title(metric_name)
-        plt.xlabel("")
-        # If metric_name is "Average Disk Used Percentage - DISK-XXXX", use "Average Disk Used Percentage"
-        base_metric_name = metric_name.split(" - ")[0]
-        plt.ylabel(y_label_map.get(base_metric_name, "millisecond"))
-
-        plt.grid(True)
-        plt.legend(
-            loc="upper right",
-            fontsize="medium",
-            borderaxespad=1.5,
-            labelspacing=1.0
-        )
-
-        ax = plt.gca()
-        ax.xaxis.set_major_formatter(DateFormatter("%d-%b-%y"))
-        plt.xticks(rotation=15)
-
-        if metric_name in ["Network Adapter In", "Network Adapter Out"]:
-            ax.ticklabel_format(style='plain', axis='y')
-            ax.yaxis.set_major_formatter(FormatStrFormatter('%.1f'))
+        plt = load_pyplot()
+        fig, ax = plt.subplots(figsize=GRAPH_FIGSIZE)
+        plot_metric(ax, timestamps, values, metric_name)
 
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-        plt.close()
+        buffer = encode_figure(fig, profile or output_profiles["standard"], max_bytes)
+        plt.close(fig)
         logging.info(f"Graph successfully generated for metric '{metric_name}'.")
         return buffer
     except Exception as e:
         logging.error(f"Error generating graph for metric '{metric_name}': {e}")
         return None
 
+def generate_host_figure(metrics_data, host_name, profile=None, max_bytes=None):
+    """
+    Generate one multi-panel figure holding all of a host's metrics, stacked with a shared time axis.
+    One rasterization per host instead of one per metric (small-multiples layout).
+    """
+    panels = [
+        (metric_name, data.get('timestamps', []), data.get('values', []))
+        for metric_name, data in metrics_data.items()
+        if data.get('timestamps') and not all(v is None for v in data.get('values', []))
+    ]
+    if not panels:
+        logging.warning(f"Cannot generate host figure for '{host_name}': Missing or invalid data.")
+        return None
+
+    plt = load_pyplot()
+    try:
+        fig, axes = plt.subplots(len(panels), 1, figsize=(8, 2 * len(panels)), sharex=True, squeeze=False)
+        for ax, (metric_name, timestamps, values) in zip(axes[:, 0], panels):
+            plot_metric(ax, timestamps, values, metric_name, legend_size="small")
+        fig.tight_layout()
+
+        buffer = encode_figure(fig, profile or output_profiles["standard"], max_bytes)
+        plt.close(fig)
+        logging.info(f"Host figure successfully generated for '{host_name}' with {len(panels)} panels.")
+        return buffer
+    except Exception as e:
+        logging.error(f"Error generating host figure for '{host_name}': {e}")
+        plt.close('all')
+        return None
+
 def sanitize_filename(filename):
     """
     Sanitize the filename by replacing specific patterns while preserving other conventions.
@@ -249,73 +412,646 @@ def sanitize_filename(filename):
     filename = filename.strip()
     return filename
 
-def create_pdf(grouped_data, management_zone, agg_time, output_pdf):
+def chart_cache_key(kind, *parts):
+    """
+    Build a content-addressed key for a chart from everything that affects its pixels:
+    the series data, the metric (which picks the scaling), the style version and the figure size.
+    """
+    payload = json.dumps([kind, CHART_STYLE_VERSION, GRAPH_FIGSIZE, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def cached_render(cache_dir, key, render):
+    """
+    Serve a chart from the on-disk cache if the same key was rendered on an earlier run, otherwise call render()
+    and store the result. With no cache_dir this is just render().
+    """
+    if not cache_dir:
+        return render()
+
+    path = os.path.join(cache_dir, f"{key}.img")  # NOTES: PNG or JPEG depending on the output profile
+    try:
+        with open(path, "rb") as cached:
+            data = cached.read()
+        os.utime(path)  # NOTES: Touch on hit so eviction drops the least recently used charts first
+        logging.debug(f"Chart cache hit: {key}")
+        return BytesIO(data)
+    except OSError:
+        pass
+
+    graph = render()
+    if graph is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as cached:
+                cached.write(graph.getvalue())
+            os.replace(temp_path, path)  # Atomic, so a crash never leaves a half-written chart behind
+        except OSError as e:
+            logging.warning(f"Could not write chart cache entry {key}: {e}")
+    return graph
+
+def prune_chart_cache(cache_dir, max_bytes):
+    """
+    Evict least recently used charts until the cache directory fits in max_bytes.
+    """
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return
+
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(".img"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+    entries.sort()  # Oldest first
+    removed = 0
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError as e:
+            logging.warning(f"Could not evict chart cache entry {path}: {e}")
+    logging.info(f"Chart cache holds {total / (1024 * 1024):.1f} MiB after evicting {removed} entries.")
+
+def chart_image(graph):
+    """
+    Wrap an in-memory chart in a fresh ImageReader for drawImage.
+    Readers are deliberately not kept: each one caches its decoded RGB pixels, so holding them until the PDF is
+    saved would keep every chart's pixels in memory. Charts with identical pixels still end up as a single
+    XObject, because reportlab names image XObjects by a digest of their RGB data.
+    """
+    from reportlab.lib.utils import ImageReader  # Hands the in-memory chart straight to the PDF, no temp file needed
+
+    return ImageReader(graph)
+
+def embedded_image_bytes(graph):
+    """
+    Estimate how many bytes a chart adds to the PDF. reportlab embeds JPEGs as they are, but decodes anything else
+    and stores it as zlib-compressed raw RGB, which is usually several times larger than the PNG itself.
+    Either way the stream is ASCII85-encoded (5 bytes for every 4) unless reportlab's useA85 is switched off.
+    """
+    from reportlab import rl_config
+
+    data = graph.getvalue()
+    if data[:2] == b"\xff\xd8":  # JPEG start-of-image marker
+        size = len(data)
+    else:
+        from PIL import Image as PILImage  # Ships with matplotlib
+
+        with PILImage.open(BytesIO(data)) as img:
+            size = len(zlib.compress(img.convert("RGB").tobytes()))  # Same data and compression reportlab uses
+    return (size * 5 + 3) // 4 if rl_config.useA85 else size
+
+# Rough size of everything on a page besides the charts (page object, text, content stream), for the MB limit
+PAGE_OVERHEAD_BYTES = 2048
+
+# Name of the form XObject holding the header/footer that repeats on every page
+PAGE_FURNITURE_FORM = "pageFurniture"
+
+def define_page_furniture(c, management_zone, width, height, margin):
+    """
+    Draw the header and footer that repeat on every page once, as a reusable form XObject.
+    Pages stamp it by reference with c.doForm(PAGE_FURNITURE_FORM) instead of re-issuing the same
+    text operators, which keeps each page's content stream small on multi-thousand-page reports.
+    """
+    c.beginForm(PAGE_FURNITURE_FORM)
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(margin, height - 50, f"Team Name/Management Zone: {management_zone}")
+    c.setStrokeGray(0.6)
+    c.setLineWidth(0.5)
+    c.line(margin, margin - 20, width - margin, margin - 20)
+    c.setFont("Helvetica", 8)
+    c.drawString(margin, margin - 32, "Dynatrace Metrics Report")
+    c.endForm()
+
+def stamp_page_furniture(c, width, margin, page_numbers):
+    """
+    Place the shared header/footer form on the current page, plus the page number (the only per-page part).
+    """
+    c.doForm(PAGE_FURNITURE_FORM)
+    if page_numbers:
+        c.setFont("Helvetica", 8)
+        c.drawRightString(width - margin, margin - 32, f"Page {c.getPageNumber()}")
+
+def volume_filename(output_pdf, volume_number):
+    """
+    Name of the Nth volume of a split report: the first volume keeps output_pdf, later ones get -partN.
+    """
+    if volume_number == 1:
+        return output_pdf
+    stem, ext = os.path.splitext(output_pdf)
+    return f"{stem}-part{volume_number}{ext}"
+
+def write_volume_index(output_pdf, volumes):
+    """
+    Write a small CSV next to the report listing which hosts landed in which volume.
+    """
+    index_path = f"{os.path.splitext(output_pdf)[0]}-volumes.csv"
+    with open(index_path, "w", newline="") as index_file:
+        writer = csv.writer(index_file)
+        writer.writerow(["Volume", "File", "Host"])
+        for volume_number, (volume_pdf, hosts) in enumerate(volumes, start=1):
+            for host_name in hosts:
+                writer.writerow([volume_number, os.path.basename(volume_pdf), host_name])
+    logging.info(f"Volume index written: {index_path}")
+    return index_path
+
+def chart_budget_for(grouped_data, target_mb, layout="stacked", panels_per_page=8):
+    """
+    Split a target PDF size evenly over the charts about to be drawn and return the per-chart byte budget.
+    10% is held back for text, page streams and PDF structure.
+    """
+    if layout == "multiples":
+        chart_count = sum(-(-len(m) // panels_per_page) for m in grouped_data.values())
+    else:
+        chart_count = sum(
+            1 for m in grouped_data.values() for d in m.values()
+            if d.get('timestamps') and not all(v is None for v in d.get('values', []))
+        )
+    chart_budget = budget_bucket(target_mb * 1024 * 1024 * 0.9 / max(chart_count, 1))
+    logging.info(f"Size budget {target_mb} MB over {chart_count} charts: {chart_budget} bytes per chart.")
+    return chart_budget
+
+def create_pdf(grouped_data, management_zone, agg_time, output_pdf, layout="stacked", panels_per_page=8,
+               cache_dir=None, cache_max_mb=500, profile_name="standard", target_mb=None,
+               include_title=True, total_hosts=None, show_progress=True, page_numbers=True,
+               max_pages_per_volume=None, max_mb_per_volume=None, chart_budget=None):
     """
     Create a PDF report organized by host, embedding the graphs for each metric.
+    layout="stacked" draws one chart per metric; layout="multiples" draws one multi-panel figure per host
+    page holding up to panels_per_page metrics.
+    cache_dir enables the chart cache: charts whose data has not changed since an earlier run are read back
+    from disk instead of being re-rendered, and the cache is trimmed to cache_max_mb afterwards.
+    profile_name picks an entry of output_profiles. target_mb, if set, is split evenly across the charts and each
+    chart is re-encoded at lower quality until it fits its share. chart_budget passes that per-chart share in
+    directly instead (create_pdf_sharded works it out once over all hosts and checks the merged size itself).
+    include_title=False skips the title page and total_hosts overrides the host count shown on it; both are used
+    when the report is rendered in shards (see create_pdf_sharded).
+    page_numbers=False leaves the page number out of the footer (shards cannot know their final page numbers).
+    max_pages_per_volume / max_mb_per_volume split the report into self-contained volumes (output-part2.pdf, ...),
+    each with its own title page. A host is never split across volumes, so a volume only goes over the page limit
+    when a single host needs more pages than that. For the MB limit each host's charts are rendered first and
+    sized as reportlab will embed them, and the volume rolls over before a host would take it past the limit.
+    Returns the list of PDF files written.
     """
-    c = canvas.Canvas(output_pdf, pagesize=letter)
+    from reportlab.pdfgen import canvas  # This is the PDF Architect
+    from reportlab.lib.pagesizes import letter  # Manages Page Size and specific standards
+
+    profile = output_profiles[profile_name]
+    if target_mb and chart_budget is None:
+        chart_budget = chart_budget_for(grouped_data, target_mb, layout, panels_per_page)
+
+    split_volumes = bool(max_pages_per_volume or max_mb_per_volume)
     width, height = letter
     margin = 55
     chart_height = 135
     chart_spacing = 15
     y_position = height - margin
+    volumes = []  # NOTES: (file name, [hosts]) for every volume written so far
+    c = None
+    volume_images = set()  # NOTES: sha1 of the chart bytes already embedded in the current volume (digests only, never readers)
+    volume_bytes = 0  # NOTES: Estimated bytes of the unique chart images embedded in the current volume
+    max_volume_bytes = max_mb_per_volume * 1024 * 1024 if max_mb_per_volume else None
+    page_open = False
 
     def start_new_page():
-        nonlocal y_position
-        c.showPage()
+        nonlocal y_position, page_open
+        if page_open:
+            c.showPage()
+        page_open = True
         y_position = height - margin
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(margin, height - 50, f"Team Name/Management Zone: {management_zone}")
+        stamp_page_furniture(c, width, margin, page_numbers)
 
-    # Add initial header
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(margin, height - 50, f"Team Name/Management Zone: {management_zone}")
-    c.drawString(margin, height - 65, f"Report Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    c.drawString(margin, height - 80, f"Aggregation Period: {agg_time}")
-    c.drawString(margin, height - 95, f"Number of Hosts/Servers: {len(grouped_data)}")
-    c.drawString(margin, height - 110, "Resources/Metrics:")
+    def open_volume():
+        nonlocal c, volume_images, volume_bytes, page_open, y_position
+        volume_pdf = volume_filename(output_pdf, len(volumes) + 1)
+        volumes.append((volume_pdf, []))
+        c = canvas.Canvas(volume_pdf, pagesize=letter)
+        volume_images = set()
+        volume_bytes = 0
+        page_open = include_title  # NOTES: A shard without a title page must not start with a blank page
+        define_page_furniture(c, management_zone, width, height, margin)
+
+        # Add initial header
+        if include_title:
+            stamp_page_furniture(c, width, margin, page_numbers)
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(margin, height - 65, f"Report Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            c.drawString(margin, height - 80, f"Aggregation Period: {agg_time}")
+            c.drawString(margin, height - 95, f"Number of Hosts/Servers: {total_hosts or len(grouped_data)}")
+            c.drawString(margin, height - 110, "Resources/Metrics:")
+
+            y_position = height - 130
+            for metric_name in metrics.keys():
+                c.drawString(margin + 20, y_position, f"- {metric_name}")
+                y_position -= 15
 
-    y_position = height - 130
-    for metric_name in metrics.keys():
-        c.drawString(margin + 20, y_position, f"- {metric_name}")
-        y_position -= 15
+            if split_volumes:
+                y_position -= 10
+                c.drawString(margin, y_position, f"Volume {len(volumes)}")
+                y_position -= 15
 
-    y_position -= 20
+            y_position -= 20
 
-    total_hosts = len(grouped_data)
+    def close_volume():
+        c.save()
+        logging.info(f"{volumes[-1][0]}: {len(volumes[-1][1])} hosts, {len(volume_images)} unique chart images.")
+
+    def chart_sizes(charts):
+        # (digest, embedded bytes) of each distinct chart; only needed for the MB limit
+        sizes = {}
+        for graph in charts:
+            if graph is not None:
+                digest = hashlib.sha1(graph.getvalue()).hexdigest()
+                if digest not in sizes:
+                    sizes[digest] = embedded_image_bytes(graph)
+        return sizes
+
+    def place_chart(graph, sizes):
+        nonlocal volume_bytes
+        digest = hashlib.sha1(graph.getvalue()).hexdigest()
+        if digest not in volume_images:
+            volume_images.add(digest)
+            volume_bytes += sizes.get(digest, 0)
+        return chart_image(graph)
+
+    def render_host_charts(host_name, metrics_data):
+        # Render (or read from the cache) all of a host's charts before drawing, so its size is known up front.
+        # "multiples" returns one entry per page chunk (None if that chunk has nothing to plot).
+        if layout == "multiples":
+            charts = []
+            metric_names = list(metrics_data.keys())
+            for chunk_start in range(0, len(metric_names), panels_per_page):
+                chunk = {name: metrics_data[name] for name in metric_names[chunk_start:chunk_start + panels_per_page]}
+                key = chart_cache_key("host", profile, chart_budget, panels_per_page, list(chunk.items()))
+                charts.append(cached_render(cache_dir, key, lambda: generate_host_figure(chunk, host_name, profile, chart_budget)))
+            return charts
+
+        charts = []
+        for metric_name, data in metrics_data.items():
+            timestamps = data.get('timestamps', [])
+            values = data.get('values', [])
+            if not timestamps or all(v is None for v in values):
+                continue
+
+            key = chart_cache_key("graph", profile, chart_budget, metric_name, timestamps, values)
+            graph = cached_render(cache_dir, key, lambda: generate_graph(timestamps, values, metric_name, profile, chart_budget))
+            if graph is not None:
+                charts.append(graph)
+        return charts
+
+    def pages_needed(metrics_data):
+        # Replays the page-break arithmetic of the drawing loop below without drawing anything
+        if layout == "multiples":
+            return max(1, -(-len(metrics_data) // panels_per_page))
+        charts = sum(
+            1 for d in metrics_data.values()
+            if d.get('timestamps') and not all(v is None for v in d.get('values', []))
+        )
+        pages, y = 1, height - margin - 50
+        for _ in range(charts):
+            if y - chart_height - chart_spacing < margin:
+                pages += 1
+                y = height - margin
+            y -= (chart_height + chart_spacing)
+        return pages
+
+    def volume_full(metrics_data, sizes):
+        # True if adding this host would take the current volume over a limit
+        pages_used = c.getPageNumber() if page_open else 0
+        if max_pages_per_volume and pages_used + pages_needed(metrics_data) > max_pages_per_volume:
+            return True
+        if not max_volume_bytes:
+            return False
+        host_bytes = sum(size for digest, size in sizes.items() if digest not in volume_images)
+        pages = pages_used + pages_needed(metrics_data)
+        return volume_bytes + host_bytes + pages * PAGE_OVERHEAD_BYTES > max_volume_bytes
+
+    open_volume()
+    host_count = len(grouped_data)
     host_start_time = time.time()
     for idx, (host_name, metrics_data) in enumerate(grouped_data.items(), start=1):
+        charts = render_host_charts(host_name, metrics_data)
+        sizes = chart_sizes(charts) if max_volume_bytes else {}
+        if split_volumes and volumes[-1][1] and volume_full(metrics_data, sizes):
+            close_volume()
+            open_volume()
+        volumes[-1][1].append(host_name)
+
         start_new_page()
         c.setFont("Helvetica-Bold", 14)
         y_position -= 20
         c.drawString(margin, y_position, f"Host: {host_name}")
         y_position -= 30
 
-        for metric_name, data in metrics_data.items():
-            timestamps = data.get('timestamps', [])
-            values = data.get('values', [])
-            if not timestamps or all(v is None for v in values):
-                continue
-
-            graph = generate_graph(timestamps, values, metric_name)
-            if graph is None:
-                continue
+        if layout == "multiples":
+            # NEW: Small-multiples mode. All of this host's metrics go into one figure per page.
+            for chunk_index, graph in enumerate(charts):
+                if chunk_index:
+                    start_new_page()
+                    c.setFont("Helvetica-Bold", 14)
+                    y_position -= 20
+                    c.drawString(margin, y_position, f"Host: {host_name} (continued)")
+                    y_position -= 30
+                if graph is None:
+                    continue
+                image = place_chart(graph, sizes)
+                # Fit the figure into what is left of the page, keeping its aspect ratio and pinning it to the top
+                c.drawImage(image, margin, margin, width=width - 2 * margin, height=y_position - margin,
+                            preserveAspectRatio=True, anchor='n')
+            if show_progress:
+                print_progress(idx, host_count, host_start_time, prefix='Processing hosts')
+            continue
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as temp_image:
-                temp_image.write(graph.getvalue())
-                temp_image_path = temp_image.name
+        for graph in charts:
+            image = place_chart(graph, sizes)
 
             if y_position - chart_height - chart_spacing < margin:
                 start_new_page()
 
-            c.drawImage(temp_image_path, margin, y_position - chart_height, width=450, height=chart_height)
+            c.drawImage(image, margin, y_position - chart_height, width=450, height=chart_height)
             y_position -= (chart_height + chart_spacing)
 
-        print_progress(idx, total_hosts, host_start_time, prefix='Processing hosts')
+        if show_progress:
+            print_progress(idx, host_count, host_start_time, prefix='Processing hosts')
+
+    close_volume()
+    volume_files = [volume_pdf for volume_pdf, _ in volumes]
+    if split_volumes:
+        write_volume_index(output_pdf, volumes)
 
-    c.save()
+    pdf_mb = sum(os.path.getsize(volume_pdf) for volume_pdf in volume_files) / (1024 * 1024)
+    logging.info(f"PDF written with '{profile_name}' profile: {pdf_mb:.1f} MB in {len(volume_files)} file(s).")
+    if target_mb and pdf_mb > target_mb:
+        logging.warning(f"PDF is {pdf_mb:.1f} MB, over the {target_mb} MB target. Try the draft profile.")
+    if cache_max_mb:
+        prune_chart_cache(cache_dir, cache_max_mb * 1024 * 1024)
+    return volume_files
+
+def render_shard(shard_index, shard_data, management_zone, agg_time, shard_pdf, total_hosts, pdf_options):
+    """
+    Worker entry point for sharded generation: render one slice of hosts into its own partial PDF.
+    Only the first shard carries the title page.
+    """
+    create_pdf(shard_data, management_zone, agg_time, shard_pdf, include_title=(shard_index == 0),
+               total_hosts=total_hosts, show_progress=False, page_numbers=False, **pdf_options)
+    return shard_index, len(shard_data)
+
+def merge_pdfs(partial_pdfs, output_pdf):
+    """
+    Concatenate partial PDFs, in the order given, into the final report.
+    """
+    from pypdf import PdfWriter  # NOTES: Only needed for sharded generation. pip install pypdf
+
+    writer = PdfWriter()
+    for partial_pdf in partial_pdfs:
+        writer.append(partial_pdf)
+    with open(output_pdf, "wb") as merged:
+        writer.write(merged)
+    writer.close()
+
+def create_pdf_sharded(grouped_data, management_zone, agg_time, output_pdf, workers, **pdf_options):
+    """
+    Create the same report as create_pdf, but split the hosts into contiguous shards that are rendered
+    to partial PDFs in parallel worker processes and then merged in host order with the title page first.
+    pdf_options are passed through to create_pdf (layout, cache_dir, profile_name, target_mb, ...).
+    """
+    hosts = list(grouped_data.items())
+    # A couple of shards per worker keeps every core busy when some hosts have far more charts than others
+    shard_count = max(1, min(len(hosts), workers * 2))
+    shard_size = -(-len(hosts) // shard_count)
+    shards = [dict(hosts[i:i + shard_size]) for i in range(0, len(hosts), shard_size)]
+
+    cache_max_mb = pdf_options.pop("cache_max_mb", 500)
+    target_mb = pdf_options.pop("target_mb", None)
+    if target_mb:
+        # One budget over all hosts: every shard encodes its charts at the same per-chart size
+        pdf_options["chart_budget"] = chart_budget_for(grouped_data, target_mb, pdf_options.get("layout", "stacked"),
+                                                       pdf_options.get("panels_per_page", 8))
+
+    scratch_dir = tempfile.mkdtemp(prefix="metrics_pdf_shards_")
+    partial_pdfs = [os.path.join(scratch_dir, f"shard_{i:04d}.pdf") for i in range(len(shards))]
+    try:
+        shard_start_time = time.time()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for i, shard in enumerate(shards):
+                shard_options = dict(pdf_options, cache_max_mb=None)
+                futures.append(pool.submit(render_shard, i, shard, management_zone, agg_time, partial_pdfs[i],
+                                           len(hosts), shard_options))
+            hosts_done = 0
+            for future in as_completed(futures):
+                shard_index, shard_hosts = future.result()
+                hosts_done += shard_hosts
+                logging.info(f"Shard {shard_index + 1}/{len(shards)} finished ({shard_hosts} hosts).")
+                print_progress(hosts_done, len(hosts), shard_start_time, prefix='Processing hosts')
+
+        merge_start_time = time.time()
+        merge_pdfs(partial_pdfs, output_pdf)
+        logging.info(f"Merged {len(shards)} shards into {output_pdf} in {time.time() - merge_start_time:.2f}s.")
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    pdf_mb = os.path.getsize(output_pdf) / (1024 * 1024)
+    logging.info(f"Merged PDF is {pdf_mb:.1f} MB.")
+    if target_mb and pdf_mb > target_mb:
+        logging.warning(f"PDF is {pdf_mb:.1f} MB, over the {target_mb} MB target. Try the draft profile.")
+    if cache_max_mb:
+        prune_chart_cache(pdf_options.get("cache_dir"), cache_max_mb * 1024 * 1024)
+    return [output_pdf]
+
+# Size of each inline SVG chart in the HTML report (pixels)
+SVG_WIDTH = 640
+SVG_HEIGHT = 140
+
+def svg_chart(timestamps, values, metric_name):
+    """
+    Build a small inline SVG line chart for one metric. Plain string building, no matplotlib,
+    which is what makes the HTML report fast. The <title> gives screen readers a text alternative.
+    """
+    values = scale_values(values, metric_name)
+    points = [(ts, v) for ts, v in zip(timestamps, values) if v is not None]
+    if not points:
+        return None
+
+    t_min, t_max = points[0][0], points[-1][0]
+    v_min = min(v for _, v in points)
+    v_max = max(v for _, v in points)
+    t_span = (t_max - t_min) or 1
+    v_span = (v_max - v_min) or 1
+    pad_left, pad_bottom, pad_top = 60, 20, 8
+    plot_width = SVG_WIDTH - pad_left - 10
+    plot_height = SVG_HEIGHT - pad_bottom - pad_top
+
+    polyline = " ".join(
+        f"{pad_left + (ts - t_min) / t_span * plot_width:.1f},{pad_top + (1 - (v - v_min) / v_span) * plot_height:.1f}"
+        for ts, v in points
+    )
+    average = sum(v for _, v in points) / len(points)
+    start_label = datetime.fromtimestamp(t_min / 1000).strftime("%d-%b-%y %H:%M")
+    end_label = datetime.fromtimestamp(t_max / 1000).strftime("%d-%b-%y %H:%M")
+    description = (f"{metric_name} from {start_label} to {end_label}: "
+                   f"min {v_min:.2f}, average {average:.2f}, max {v_max:.2f}")
+    bottom = pad_top + plot_height
+
+    return (
+        f'<svg width="{SVG_WIDTH}" height="{SVG_HEIGHT}" viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" role="img">'
+        f'<title>{html.escape(description)}</title>'
+        f'<rect x="{pad_left}" y="{pad_top}" width="{plot_width}" height="{plot_height}" class="plot"/>'
+        f'<polyline points="{polyline}" class="line"/>'
+        f'<text x="{pad_left - 4}" y="{pad_top + 10}" text-anchor="end">{v_max:.1f}</text>'
+        f'<text x="{pad_left - 4}" y="{bottom}" text-anchor="end">{v_min:.1f}</text>'
+        f'<text x="{pad_left}" y="{SVG_HEIGHT - 4}">{start_label}</text>'
+        f'<text x="{SVG_WIDTH - 10}" y="{SVG_HEIGHT - 4}" text-anchor="end">{end_label}</text>'
+        f'</svg>'
+    )
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Helvetica, Arial, sans-serif; margin: 2em; color: #111; }}
+nav ul {{ columns: 3; }}
+section.host {{ content-visibility: auto; contain-intrinsic-size: auto 900px; border-top: 1px solid #999; }}
+.chart {{ min-height: {svg_height}px; margin: 0.5em 0 1.5em; }}
+.chart h3 {{ font-size: 1em; margin: 0; }}
+.chart small {{ color: #444; }}
+svg text {{ font-size: 11px; fill: #333; }}
+svg .plot {{ fill: #fafafa; stroke: #bbb; }}
+svg .line {{ fill: none; stroke: #0033cc; stroke-width: 1.5; }}
+</style>
+</head>
+<body>
+<header>
+<h1>Dynatrace Metrics Report</h1>
+<p><b>Team Name/Management Zone:</b> {management_zone}<br>
+<b>Report Time:</b> {report_time}<br>
+<b>Aggregation Period:</b> {agg_time}<br>
+<b>Number of Hosts/Servers:</b> {host_count}<br>
+<b>Resources/Metrics:</b> {metric_names}</p>
+</header>
+<nav aria-label="Hosts"><h2>Hosts</h2><ul>
+{host_index}
+</ul></nav>
+<main>
+{host_sections}
+</main>
+<script>
+// Charts sit in <template> tags and are only added to the page when they scroll into view
+const observer = new IntersectionObserver((entries) => {{
+  for (const entry of entries) {{
+    if (!entry.isIntersecting) continue;
+    const holder = entry.target;
+    holder.appendChild(holder.querySelector("template").content.cloneNode(true));
+    observer.unobserve(holder);
+  }}
+}}, {{ rootMargin: "400px" }});
+document.querySelectorAll(".chart").forEach((holder) => observer.observe(holder));
+</script>
+</body>
+</html>
+"""
+
+def create_html(grouped_data, management_zone, agg_time, output_html):
+    """
+    Create a static HTML report from the same grouped_data as create_pdf: a host index plus one section per host
+    with an inline SVG chart per metric. Charts are drawn by the browser only when scrolled into view.
+    """
+    host_index = []
+    host_sections = []
+    for host_number, (host_name, metrics_data) in enumerate(grouped_data.items(), start=1):
+        anchor = f"host-{host_number}"
+        host_index.append(f'<li><a href="#{anchor}">{html.escape(host_name)}</a></li>')
+
+        charts = []
+        for metric_name, data in metrics_data.items():
+            svg = svg_chart(data.get('timestamps', []), data.get('values', []), metric_name)
+            if svg is None:
+                continue
+            base_metric_name = metric_name.split(" - ")[0]
+            charts.append(
+                f'<div class="chart"><h3>{html.escape(metric_name)}</h3>'
+                f'<small>{html.escape(y_label_map.get(base_metric_name, "millisecond"))}</small>'
+                f'<template>{svg}</template></div>'
+            )
+        if not charts:
+            charts.append("<p>No data available for this host.</p>")
+
+        host_sections.append(
+            f'<section class="host" id="{anchor}"><h2>Host: {html.escape(host_name)}</h2>\n'
+            + "\n".join(charts) + "\n</section>"
+        )
+
+    with open(output_html, "w", encoding="utf-8") as report:
+        report.write(HTML_TEMPLATE.format(
+            title=html.escape(f"Dynatrace Metrics Report - {management_zone}"),
+            svg_height=SVG_HEIGHT,
+            management_zone=html.escape(management_zone),
+            report_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            agg_time=html.escape(agg_time),
+            host_count=len(grouped_data),
+            metric_names=html.escape(", ".join(metrics.keys())),
+            host_index="\n".join(host_index),
+            host_sections="\n".join(host_sections),
+        ))
+    logging.info(f"HTML report written: {output_html}")
+    return [output_html]
+
+def linearize_pdf(pdf_file):
+    """
+    Rewrite a finished PDF as linearized ("fast web view") with page hint tables, so a browser opening it from
+    the file share shows the title page and first hosts while the rest is still downloading.
+    reportlab cannot write linearized files, so this uses pikepdf (pip install pikepdf) or else the qpdf command.
+    Returns True if the file was linearized.
+    """
+    temp_path = f"{pdf_file}.linearized.tmp"
+    try:
+        try:
+            import pikepdf  # NOTES: Optional. Python bindings for qpdf
+        except ImportError:
+            pikepdf = None
+
+        if pikepdf is not None:
+            with pikepdf.open(pdf_file) as pdf:
+                pdf.save(temp_path, linearize=True)
+        elif shutil.which("qpdf"):
+            # qpdf exits with 3 when it succeeded but had warnings
+            result = subprocess.run(["qpdf", "--linearize", pdf_file, temp_path], capture_output=True, text=True)
+            if result.returncode not in (0, 3):
+                raise RuntimeError(result.stderr.strip())
+        else:
+            logging.warning("Cannot linearize: neither pikepdf nor qpdf is installed.")
+            print("Linearized output needs pikepdf (pip install pikepdf) or qpdf. Leaving the PDF as is.")
+            return False
+
+        os.replace(temp_path, pdf_file)
+        logging.info(f"Linearized {pdf_file}")
+        return True
+    except Exception as e:
+        logging.error(f"Error linearizing {pdf_file}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
 
 if __name__ == "__main__":
+    # NEW: "--prewarm" builds the font cache and exits, "--startup-time" reports how long it takes to reach the first prompt
+    if "--prewarm" in sys.argv[1:]:
+        prewarm()
+        sys.exit(0)
+    startup_seconds = time.perf_counter() - STARTUP_BEGIN
+    logging.info(f"Startup took {startup_seconds:.3f}s before the first prompt.")
+    if "--startup-time" in sys.argv[1:]:
+        print(f"Startup took {startup_seconds:.3f}s before the first prompt.")
+        sys.exit(0)
+
     overall_start = time.time()
 
     API_URL = input("Enter API URL: ").strip()
@@ -323,6 +1059,27 @@ if __name__ == "__main__":
     MZ_SELECTOR = input("Enter Management Zone Name: ").strip()
     AGG_TIME = input("Enter Aggregation Time: ").strip()
     RESOLUTION = input("Enter Resolution: ").strip()
+    OUTPUT_FORMAT = input("Enter Output Format - pdf or html (leave empty for pdf): ").strip().lower() or "pdf"
+
+    # PDF-only options. The HTML report draws its charts in the browser and needs none of these.
+    LAYOUT, CACHE_DIR, PROFILE, TARGET_MB = "stacked", None, "standard", None
+    WORKERS, MAX_PAGES, MAX_VOLUME_MB, LINEARIZE = 1, None, None, False
+    if OUTPUT_FORMAT != "html":
+        LAYOUT = input("Enter Page Layout - stacked or multiples (leave empty for stacked): ").strip().lower() or "stacked"
+        CACHE_DIR = input("Enter Chart Cache Directory (leave empty to disable): ").strip() or None
+        PROFILE = input("Enter Output Profile - draft, standard or archival (leave empty for standard): ").strip().lower() or "standard"
+        if PROFILE not in output_profiles:
+            print(f"Unknown output profile '{PROFILE}', using standard.")
+            PROFILE = "standard"
+        TARGET_MB = input("Enter Target PDF Size in MB (leave empty for no limit): ").strip()
+        TARGET_MB = float(TARGET_MB) if TARGET_MB else None
+        WORKERS = input(f"Enter Worker Processes for PDF generation (leave empty for 1, this machine has {os.cpu_count()}): ").strip()
+        WORKERS = int(WORKERS) if WORKERS else 1
+        MAX_PAGES = input("Enter Max Pages per PDF Volume (leave empty for a single file): ").strip()
+        MAX_PAGES = int(MAX_PAGES) if MAX_PAGES else None
+        MAX_VOLUME_MB = input("Enter Max MB per PDF Volume (leave empty for a single file): ").strip()
+        MAX_VOLUME_MB = float(MAX_VOLUME_MB) if MAX_VOLUME_MB else None
+        LINEARIZE = input("Linearize PDF for fast web view? (y/N): ").strip().lower() in ("y", "yes")
 
     HEADERS = {"Authorization": f"Api-Token {API_TOKEN}"}
 
@@ -337,14 +1094,35 @@ if __name__ == "__main__":
     grouped_data = group_data(raw_data, API_URL, HEADERS)
     OUTPUT_PDF = f"{sanitize_filename(MZ_SELECTOR)}-Dynatrace_Metrics_Report-{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.pdf"
 
-    if grouped_data:
+    if grouped_data and OUTPUT_FORMAT == "html":
+        print("Starting HTML generation...")
+        html_start_time = time.time()
+        OUTPUT_HTML = f"{os.path.splitext(OUTPUT_PDF)[0]}.html"
+        create_html(grouped_data, MZ_SELECTOR, AGG_TIME, OUTPUT_HTML)
+        print(f"HTML generation took: {time.time() - html_start_time:.2f} seconds")
+        print(f"HTML report generated: {OUTPUT_HTML}")
+    elif grouped_data:
         print("Starting PDF generation...")
         pdf_start_time = time.time()
-        create_pdf(grouped_data, MZ_SELECTOR, AGG_TIME, OUTPUT_PDF)
+        pdf_options = dict(layout=LAYOUT, cache_dir=CACHE_DIR, profile_name=PROFILE, target_mb=TARGET_MB)
+        if MAX_PAGES or MAX_VOLUME_MB:
+            # NOTES: Volumes are cut while pages are drawn, so splitting always runs in a single process
+            if WORKERS > 1:
+                print("Splitting into volumes runs in a single process, ignoring the worker count.")
+            pdf_files = create_pdf(grouped_data, MZ_SELECTOR, AGG_TIME, OUTPUT_PDF, max_pages_per_volume=MAX_PAGES,
+                                   max_mb_per_volume=MAX_VOLUME_MB, **pdf_options)
+        elif WORKERS > 1 and len(grouped_data) > 1:
+            pdf_files = create_pdf_sharded(grouped_data, MZ_SELECTOR, AGG_TIME, OUTPUT_PDF, WORKERS, **pdf_options)
+        else:
+            pdf_files = create_pdf(grouped_data, MZ_SELECTOR, AGG_TIME, OUTPUT_PDF, **pdf_options)
+        if LINEARIZE:
+            for pdf_file in pdf_files:
+                linearize_pdf(pdf_file)
         pdf_end_time = time.time()
         pdf_generation_time = pdf_end_time - pdf_start_time
         print(f"PDF generation took: {pdf_generation_time:.2f} seconds")
-        print(f"PDF report generated: {OUTPUT_PDF}")
+        for pdf_file in pdf_files:
+            print(f"PDF report generated: {pdf_file}")
     else:
         print("No data available to generate PDF.")
 
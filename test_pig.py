@@ -1,7 +1,11 @@
 import requests
+import csv
 import json
 import logging
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Configure logging to file and console
@@ -17,6 +21,141 @@ formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 console.setFormatter(formatter)
 logging.getLogger().addHandler(console)
 
+PROBE_MODES = (("reuse", True), ("new-connection", False))
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+def probe_endpoint(name, url, headers, request_count, concurrency, reuse_connections):
+    """
+    Calls url request_count times from `concurrency` threads and returns (summary, samples).
+    With reuse_connections each thread keeps one requests.Session (keep-alive); otherwise every request opens a
+    new connection (TCP + TLS handshake), which is what one-off requests.get calls in the report scripts pay.
+    Latency percentiles cover 2xx responses only; 429s come back fast and are summarised separately.
+    """
+    local = threading.local()
+    sessions = []  # Every thread's session, closed once the pool is done
+    sessions_lock = threading.Lock()
+
+    def call(_):
+        if reuse_connections:
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+                with sessions_lock:
+                    sessions.append(local.session)
+            http = local.session
+        else:
+            http = requests
+        started = time.perf_counter()
+        try:
+            response = http.get(url, headers=headers)
+            body_bytes = len(response.content)
+            status = response.status_code
+            # NOTES: Without Content-Length (chunked responses) the on-the-wire size is unknown; body_bytes is after decompression
+            content_length = response.headers.get("Content-Length")
+            wire_bytes = int(content_length) if content_length is not None else None
+        except requests.RequestException as e:
+            logging.debug(f"{name} request failed: {e}")
+            status, body_bytes, wire_bytes = "error", 0, 0
+        return {"endpoint": name, "mode": "reuse" if reuse_connections else "new-connection", "status": status,
+                "ms": (time.perf_counter() - started) * 1000, "body_bytes": body_bytes, "wire_bytes": wire_bytes}
+
+    wall_started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(call, range(request_count)))
+    finally:
+        for session in sessions:
+            session.close()
+    wall_seconds = time.perf_counter() - wall_started
+
+    latencies = sorted(sample["ms"] for sample in samples if sample["status"] != "error" and 200 <= sample["status"] < 300)
+    latencies_429 = sorted(sample["ms"] for sample in samples if sample["status"] == 429)
+    rate_limited = len(latencies_429)
+    summary = {
+        "endpoint": name,
+        "mode": samples[0]["mode"] if samples else None,
+        "requests": request_count,
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "status_429": rate_limited,
+        "rate_429": rate_limited / request_count if request_count else 0,
+        "errors": sum(1 for sample in samples if sample["status"] == "error"),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
+        "p50_429_ms": percentile(latencies_429, 50),
+        "body_bytes": sum(sample["body_bytes"] for sample in samples),
+        "wire_bytes": None if any(sample["wire_bytes"] is None for sample in samples)
+                      else sum(sample["wire_bytes"] for sample in samples),
+        "wall_seconds": wall_seconds,
+        "requests_per_second": request_count / wall_seconds if wall_seconds else None,
+    }
+    return summary, samples
+
+def run_probe(endpoints, headers, request_count, concurrency, report_prefix):
+    """
+    Probes every (name, url) endpoint with and without connection reuse, logs the results and writes
+    <report_prefix>.json (summaries and reuse comparison), <report_prefix>_summary.csv and <report_prefix>_samples.csv.
+    """
+    summaries = []
+    all_samples = []
+    logging.getLogger("urllib3").setLevel(logging.INFO)  # Per-connection debug lines would drown the probe output
+    for index, (name, url) in enumerate(endpoints):
+        # NOTES: One unmeasured warm-up call first, and the mode order alternates per endpoint, so neither mode
+        # always pays for a cold server cache or DNS lookup
+        try:
+            requests.get(url, headers=headers).close()
+        except requests.RequestException as e:
+            logging.debug(f"{name} warm-up request failed: {e}")
+        modes = PROBE_MODES if index % 2 == 0 else PROBE_MODES[::-1]
+        for mode, reuse in modes:
+            logging.info(f"Probing {name} ({mode}): {request_count} requests, concurrency {concurrency}...")
+            summary, samples = probe_endpoint(name, url, headers, request_count, concurrency, reuse)
+            summaries.append(summary)
+            all_samples.extend(samples)
+            logging.info(
+                f"{name} ({mode}): 2xx p50 {summary['p50_ms'] or 0:.0f} ms, p95 {summary['p95_ms'] or 0:.0f} ms, "
+                f"p99 {summary['p99_ms'] or 0:.0f} ms, 429 rate {summary['rate_429']:.1%} "
+                f"(p50 {summary['p50_429_ms'] or 0:.0f} ms), errors {summary['errors']}, "
+                f"{summary['requests_per_second'] or 0:.1f} req/s, "
+                f"{'unknown' if summary['wire_bytes'] is None else summary['wire_bytes']} wire bytes"
+            )
+
+    # Connection-reuse effect: how much slower each endpoint is when every request opens a new connection
+    reuse_effect = []
+    for name, _ in endpoints:
+        by_mode = {summary["mode"]: summary for summary in summaries if summary["endpoint"] == name}
+        reused, fresh = by_mode["reuse"], by_mode["new-connection"]
+        effect = {"endpoint": name}
+        for key in ("p50_ms", "p95_ms"):
+            if reused[key] and fresh[key]:
+                effect[f"{key}_saved"] = fresh[key] - reused[key]
+                effect[f"{key}_ratio"] = fresh[key] / reused[key]
+        reuse_effect.append(effect)
+        if "p50_ms_saved" in effect:
+            logging.info(f"{name}: p50 {reused['p50_ms']:.0f} ms with connection reuse vs {fresh['p50_ms']:.0f} ms "
+                         f"with a new connection per request ({effect['p50_ms_ratio']:.2f}x)")
+
+    with open(f"{report_prefix}.json", "w") as file:
+        json.dump({"created": datetime.now().isoformat(timespec="seconds"), "summaries": summaries,
+                   "connection_reuse": reuse_effect}, file, indent=2)
+    with open(f"{report_prefix}_summary.csv", "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(summaries[0].keys()))
+        writer.writeheader()
+        writer.writerows(summaries)
+    with open(f"{report_prefix}_samples.csv", "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(all_samples[0].keys()))
+        writer.writeheader()
+        writer.writerows(all_samples)
+    logging.info(f"Probe report written to {report_prefix}.json, {report_prefix}_summary.csv and {report_prefix}_samples.csv")
+    return summaries, reuse_effect
+
 def main():
     # Prompt for input parameters
     api_url = input("Enter API URL: ").strip()
@@ -25,6 +164,15 @@ def main():
     agg_time = input("Enter Aggregation Time: ").strip()
     resolution = input("Enter Resolution (leave empty if not applicable): ").strip()
 
+    # Optional latency probe / load benchmark, run after the connectivity check
+    probe_input = input("Requests per endpoint for a latency probe (leave empty to skip): ").strip()
+    probe_requests = int(probe_input) if probe_input.isdigit() and int(probe_input) > 0 else 0
+    probe_concurrency = 4
+    if probe_requests:
+        concurrency_input = input("Probe concurrency (leave empty for 4): ").strip()
+        probe_concurrency = int(concurrency_input) if concurrency_input.isdigit() and int(concurrency_input) > 0 else 4
+    report_prefix = f"api_probe_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
     headers = {"Authorization": f"Api-Token {api_token}"}
 
     # Build the Metrics API URL using exact quoting (critical for success)
@@ -44,6 +192,9 @@ def main():
     if response.status_code != 200:
         logging.error("Error connecting to Metrics API. Response: " + response.text)
         print("Error connecting to Metrics API")
+        if probe_requests and response.status_code == 429:
+            # Rate limiting is exactly what the probe measures
+            run_probe([("metrics/query", metric_url)], headers, probe_requests, probe_concurrency, report_prefix)
         return
 
     data = response.json()
@@ -64,6 +215,8 @@ def main():
             break
     if not disk_id:
         logging.error("No dimensions found in any result.")
+        if probe_requests:
+            run_probe([("metrics/query", metric_url)], headers, probe_requests, probe_concurrency, report_prefix)
         return
 
     logging.info(f"Extracted disk entity ID: {disk_id}")
@@ -79,6 +232,8 @@ def main():
     if ent_response.status_code != 200:
         logging.error("Error connecting to Entities API for disk entity. Response: " + ent_response.text)
         print("Error connecting to Entities API for disk entity.")
+        if probe_requests and ent_response.status_code == 429:
+            run_probe([("metrics/query", metric_url), ("entities", entity_url)], headers, probe_requests, probe_concurrency, report_prefix)
         return
 
     ent_data = ent_response.json()
@@ -91,5 +246,8 @@ def main():
     else:
         logging.info("No 'isDiskOf' relationship found for this disk.")
 
+    if probe_requests:
+        run_probe([("metrics/query", metric_url), ("entities", entity_url)], headers, probe_requests, probe_concurrency, report_prefix)
+
 if __name__ == "__main__":
     main()